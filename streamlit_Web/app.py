@@ -1,6 +1,7 @@
 import streamlit as st
+import importlib
 from datetime import datetime, timedelta
-from data_manager import init_db, get_sido_list, get_filtered_data
+from data_manager import init_db, get_sido_options, get_filtered_data
 from ui_components import (
     render_header, 
     render_sidebar, 
@@ -9,41 +10,35 @@ from ui_components import (
     inject_custom_css,
     render_footer
 )
-from tabs import map_view, analysis_dashboard_view, detail_view, favorites_view, prediction_view, web_scraping_view
 
 # --- 1. 탭 설정 ---
+# 탭 모듈은 선택되었을 때만 임포트 (예측 탭의 TensorFlow 등 무거운 의존성을 다른 탭에서 로드하지 않음)
 TABS = [
-    {"label": "📍 지도 & 분석", "show_func": map_view.show},
-    {"label": "📊 분석 대시보드", "show_func": analysis_dashboard_view.show},
-    {"label": "📋 보호소 상세 현황", "show_func": detail_view.show},
-    {"label": "🔮 예측", "show_func": prediction_view.show},
-    {"label": "❤️ 찜한 동물", "show_func": favorites_view.show},
-    {"label": "🏵️ PIMFYVIRUS", "show_func": web_scraping_view.show}
+    {"label": "📍 지도 & 분석", "module": "tabs.map_view"},
+    {"label": "📊 분석 대시보드", "module": "tabs.analysis_dashboard_view"},
+    {"label": "📋 보호소 상세 현황", "module": "tabs.detail_view"},
+    {"label": "🔮 예측", "module": "tabs.prediction_view"},
+    {"label": "❤️ 찜한 동물", "module": "tabs.favorites_view"},
+    {"label": "🏵️ PIMFYVIRUS", "module": "tabs.web_scraping_view"}
 ]
 
 from datetime import datetime, timedelta
 
 def init_session_state():
-    """세션 상태를 초기화합니다."""
+    """세션 상태를 초기화합니다. (이미 있는 키는 setdefault가 그대로 두므로 기존 값이 유지됨)"""
     # 탭 상태 초기화
-    if "active_tab_label" not in st.session_state:
-        st.session_state.active_tab_label = "📍 지도 & 분석"
-    if 'favorites' not in st.session_state:
-        st.session_state.favorites = []
+    st.session_state.setdefault("active_tab_label", "📍 지도 & 분석")
+    # 찜 목록은 포함 여부 확인/추가/삭제가 O(1)이 되도록 set으로 관리
+    st.session_state.setdefault("favorites", set())
 
     # 필터 상태 초기화
-    if "start_date" not in st.session_state:
-        st.session_state.start_date = (datetime.now() - timedelta(days=30)).date()
-    if "end_date" not in st.session_state:
-        st.session_state.end_date = datetime.now().date()
-    if "species_filter" not in st.session_state:
-        st.session_state.species_filter = []
-    if "sido_filter" not in st.session_state:
-        st.session_state.sido_filter = "전체"
-    if "sigungu_filter" not in st.session_state:
-        st.session_state.sigungu_filter = "전체"
-    if "selected_shelter" not in st.session_state:
-        st.session_state.selected_shelter = None
+    today = datetime.now().date()
+    st.session_state.setdefault("start_date", today - timedelta(days=30))
+    st.session_state.setdefault("end_date", today)
+    st.session_state.setdefault("species_filter", [])
+    st.session_state.setdefault("sido_filter", "전체")
+    st.session_state.setdefault("sigungu_filter", "전체")
+    st.session_state.setdefault("selected_shelter", None)
 
 def main():
     """메인 애플리케이션 실행 함수"""
@@ -61,8 +56,8 @@ def main():
 
     # --- UI 렌더링 ---
     render_header()
-    sido_list = get_sido_list()
-    render_sidebar(sido_list)
+    sido_names, sido_codes = get_sido_options()
+    render_sidebar(sido_names, sido_codes)
 
     # --- 데이터 로딩 및 필터링 ---
     with st.spinner("🐾 데이터를 열심히 불러오고 있어요... 잠시만 기다려주세요!"):
@@ -71,12 +66,13 @@ def main():
         if st.session_state.active_tab_label == "📋 보호소 상세 현황":
             data_sido, data_sigungu = "전체", "전체"
         
+        # 축종 선택 순서와 무관하게 같은 캐시 키가 되도록 정렬된 튜플로 전달
         data = get_filtered_data(
             st.session_state.start_date, 
             st.session_state.end_date, 
             data_sido, 
             data_sigungu, 
-            st.session_state.species_filter
+            tuple(sorted(st.session_state.species_filter))
         )
         final_animals, filtered_shelters, shelter_count, animal_count, long_term_count, adopted_count = data
 
@@ -87,16 +83,17 @@ def main():
         render_kpi_cards(shelter_count, animal_count, long_term_count, adopted_count)
         
         active_tab = render_tabs(TABS)
+        show_func = importlib.import_module(active_tab["module"]).show
         
         # 선택된 탭에 따라 적절한 인자를 전달하여 show 함수 호출
         if active_tab["label"] == "📍 지도 & 분석":
-            active_tab["show_func"](filtered_shelters, final_animals)
+            show_func(filtered_shelters, final_animals)
         elif active_tab["label"] == "📊 분석 대시보드":
-            active_tab["show_func"](final_animals, filtered_shelters)
+            show_func(final_animals, filtered_shelters)
         elif active_tab["label"] == "📋 보호소 상세 현황":
-            active_tab["show_func"](filtered_shelters)
+            show_func(filtered_shelters)
         else:
-            active_tab["show_func"]()
+            show_func()
 
     # --- 푸터 ---
     render_footer()
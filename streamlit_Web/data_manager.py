@@ -1,5 +1,6 @@
 
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 import configparser
@@ -10,7 +11,7 @@ from urllib.parse import quote
 import subprocess
 import tempfile
 from datetime import date
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # --- 경로 및 설정 로드 ---
 current_script_path = os.path.abspath(__file__)
@@ -73,7 +74,7 @@ def fetch_api_data_powershell(url: str) -> ET.Element | None:
         if os.path.exists(temp_path):
             os.remove(temp_path)
 
-@st.cache_data
+@st.cache_data(ttl=3600)
 def get_sido_list() -> List[dict]:
     api_key = get_api_key()
     if not api_key: return []
@@ -84,7 +85,7 @@ def get_sido_list() -> List[dict]:
     if root is None: return []
     return [{"code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")} for item in root.findall('.//item')]
 
-@st.cache_data
+@st.cache_data(ttl=3600)
 def get_sigungu_list(sido_code: str) -> List[dict]:
     if not sido_code: return []
     api_key = get_api_key()
@@ -96,6 +97,24 @@ def get_sigungu_list(sido_code: str) -> List[dict]:
     if root is None: return []
     return [{"code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")} for item in root.findall('.//item')]
 
+@st.cache_data(ttl=3600)
+def get_sido_options() -> Tuple[List[str], Dict[str, str]]:
+    """
+    사이드바 시도 선택 상자용 이름 목록("전체" 포함)과 이름→코드 매핑을 반환합니다.
+    재실행마다 목록을 다시 만들지 않도록 결과를 캐싱합니다.
+    """
+    sido_list = get_sido_list()
+    sido_names = ["전체"] + [s['name'] for s in sido_list]
+    sido_codes = {s['name']: s['code'] for s in sido_list}
+    return sido_names, sido_codes
+
+@st.cache_data(ttl=3600)
+def get_sigungu_names(sido_code: str) -> List[str]:
+    """
+    시도 코드별 시군구 선택 상자용 이름 목록("전체" 포함)을 반환합니다.
+    """
+    return ["전체"] + [s['name'] for s in get_sigungu_list(sido_code)]
+
 @st.cache_data
 def get_kind_list(upkind_code: str = '') -> List[dict]:
     api_key = get_api_key()
@@ -119,6 +138,7 @@ def get_kind_list(upkind_code: str = '') -> List[dict]:
             page_no += 1
     return list({v['code']:v for v in all_kinds}.values())
 
+@st.cache_resource
 def init_db():
     engine = get_db_engine()
     if engine is None: 
@@ -132,8 +152,12 @@ def init_db():
     except Exception as e:
         st.error(f"DB 초기화 중 오류 발생: {e}")
 
-@st.cache_data
+@st.cache_resource(show_spinner=False)
 def load_data(table_name: str) -> pd.DataFrame:
+    """
+    DB 테이블 전체를 읽어 DataFrame으로 반환합니다.
+    cache_data처럼 호출마다 결과를 직렬화/복사하지 않고 같은 객체를 공유하므로, 호출부에서는 읽기 전용으로 사용해야 합니다.
+    """
     engine = get_db_engine()
     if engine is None: return pd.DataFrame()
     try:
@@ -142,44 +166,83 @@ def load_data(table_name: str) -> pd.DataFrame:
             if table_name == 'shelters':
                 data['lat'] = pd.to_numeric(data['lat'], errors='coerce')
                 data['lon'] = pd.to_numeric(data['lon'], errors='coerce')
+            elif table_name == 'animals':
+                # 공고일은 값 종류가 적으므로 cache=True로 한 번만 파싱하여, 필터링 때마다 다시 변환하지 않음
+                data['notice_date'] = pd.to_datetime(data['notice_date'], cache=True)
             return data
     except Exception as e:
         st.warning(f"'{table_name}' 테이블 로딩 중 오류: {e}. 빈 데이터를 반환합니다.")
         return pd.DataFrame()
 
-@st.cache_data
+@st.cache_resource(show_spinner=False)
+def _load_filter_tables() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    필터링에 사용할 animals/shelters 테이블을 반환합니다. (읽기 전용)
+    shelter_name은 두 테이블이 같은 카테고리를 공유하는 범주형으로, upkind_name도 범주형으로 한 번만 변환하여
+    isin/merge가 객체 문자열 대신 정수 코드로 동작하도록 합니다.
+    """
+    animals = load_data("animals")
+    shelters = load_data("shelters")
+    if animals.empty or shelters.empty:
+        return animals, shelters
+
+    shelter_names = pd.concat([animals['shelter_name'], shelters['shelter_name']]).dropna().unique()
+    shelter_dtype = pd.CategoricalDtype(categories=shelter_names)
+    animals = animals.assign(
+        shelter_name=animals['shelter_name'].astype(shelter_dtype),
+        upkind_name=animals['upkind_name'].astype('category'),
+    )
+    # 주소의 첫 단어(시도)를 미리 범주형 컬럼으로 만들어, 시도 접두어 검사를 행마다가 아니라 범주(시도 종류 수)마다 한 번만 수행
+    addr_col = "care_addr" if "care_addr" in shelters.columns else "careAddr"
+    shelters = shelters.assign(
+        shelter_name=shelters['shelter_name'].astype(shelter_dtype),
+        sido_name=shelters[addr_col].str.split(' ', n=1).str[0].astype('category'),
+    )
+    return animals, shelters
+
+@st.cache_data(ttl=300, max_entries=64)
 def get_filtered_data(
     start_date: date, 
     end_date: date, 
     sido: str, 
     sigungu: str, 
-    species: List[str]
+    species: Tuple[str, ...]
 ) -> Tuple[pd.DataFrame, pd.DataFrame, int, int, int, int]:
-    animals = load_data("animals")
-    shelters = load_data("shelters")
+    animals, shelters = _load_filter_tables()
 
     if animals.empty or shelters.empty:
         return pd.DataFrame(), pd.DataFrame(), 0, 0, 0, 0
 
-    animals['notice_date'] = pd.to_datetime(animals['notice_date'])
-    mask = (animals['notice_date'].dt.date >= start_date) & (animals['notice_date'].dt.date <= end_date)
-    filtered_animals = animals[mask]
-
+    # 1. 공고일/축종 조건으로 동물 필터링 (마스크를 합쳐 한 번만 인덱싱)
+    # 행마다 datetime.date 객체를 만들지 않고 datetime64 값끼리 바로 비교 (종료일은 그날 하루 전체 포함)
+    start_ts = pd.Timestamp(start_date)
+    end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    mask = (animals['notice_date'] >= start_ts) & (animals['notice_date'] < end_ts)
     if species:
-        filtered_animals = filtered_animals[filtered_animals['upkind_name'].isin(species)]
-
-    shelter_names_with_animals = filtered_animals['shelter_name'].unique()
-    filtered_shelters = shelters[shelters['shelter_name'].isin(shelter_names_with_animals)]
+        mask &= animals['upkind_name'].isin(species)
+    filtered_animals = animals[mask]
 
-    addr_col = "care_addr" if "care_addr" in filtered_shelters.columns else "careAddr"
+    # 2. 지역 조건은 동물과 무관하므로 보호소 테이블에 먼저 적용
+    region_shelters = shelters
     if sido != "전체":
-        filtered_shelters = filtered_shelters[filtered_shelters[addr_col].str.startswith(sido, na=False)]
+        # 주소가 시도로 시작하는지 (주소의 첫 단어가 시도로 시작하는 것과 같으므로 범주 목록에서만 접두어 검사)
+        sido_categories = shelters['sido_name'].cat.categories
+        region_shelters = shelters[shelters['sido_name'].isin(sido_categories[sido_categories.str.startswith(sido)])]
     if sigungu != "전체":
-        full_region_name = f"{sido} {sigungu}"
-        filtered_shelters = filtered_shelters[filtered_shelters[addr_col].str.startswith(full_region_name, na=False)]
-
-    final_animal_shelters = filtered_shelters['shelter_name'].unique()
-    final_animals = filtered_animals[filtered_animals['shelter_name'].isin(final_animal_shelters)]
+        # 시군구는 기존과 같이 '시도 시군구' 주소 접두어로 비교하되, 시도로 이미 좁힌 보호소에만 적용
+        # (시도가 '전체'이면 기존과 같이 '전체 시군구'로 시작하는 주소만 남으므로 사실상 결과 없음)
+        addr_col = "care_addr" if "care_addr" in shelters.columns else "careAddr"
+        region_shelters = region_shelters[region_shelters[addr_col].str.startswith(f"{sido} {sigungu}", na=False)]
+
+    # 3. 지역 조건을 만족하는 보호소의 동물만 남김
+    final_animals = filtered_animals[filtered_animals['shelter_name'].isin(region_shelters['shelter_name'])]
+
+    # 4. 남은 동물이 있는 보호소만 남김 (unique 정렬 없이 공유 범주 코드로 바로 판별)
+    # 마지막 칸은 결측값 코드(-1)용으로 항상 False로 둠
+    animal_codes = final_animals['shelter_name'].cat.codes.to_numpy()
+    has_animals = np.zeros(len(shelters['shelter_name'].cat.categories) + 1, dtype=bool)
+    has_animals[animal_codes[animal_codes >= 0]] = True
+    filtered_shelters = region_shelters[has_animals[region_shelters['shelter_name'].cat.codes.to_numpy()]]
 
     shelter_count = filtered_shelters['shelter_name'].nunique()
     animal_count = len(final_animals)
@@ -1,8 +1,7 @@
-
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import load_model
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import pickle
 
@@ -12,9 +11,14 @@ class AnimalShelterPredictor:
         self.assets_path = assets_path
         self.sequence_length = sequence_length
         self.model = None
+        self._predict_fn = None
+        self._predict_fn_uses_xla = False
         self.label_encoder = None
         self.scaler = None
         self.latest_sequences = None
+        self.org_ids = None
+        self.org_names = None
+        self.sequence_batch = None
         self.data_last_date = None
         self.is_loaded = False
 
@@ -29,11 +33,29 @@ class AnimalShelterPredictor:
 
         try:
             self.model = load_model(self.model_path)
+            # model.predict()의 배치 분할/이터레이터 설정 오버헤드 없이 한 번에 순전파하도록 그래프로 감싸고,
+            # XLA로 컴파일하여 LSTM 스텝의 연산을 커널 단위로 합쳐 실행
+            self._predict_fn = self._build_predict_fn(jit_compile=True)
+            self._predict_fn_uses_xla = True
             with open(self.assets_path, 'rb') as f:
                 assets = pickle.load(f)
             self.label_encoder = assets['label_encoder']
             self.scaler = assets['scaler']
             self.latest_sequences = assets['latest_sequences']
+            # 예측마다 보호소별 시퀀스를 다시 쌓지 않도록 (N, seq_len, n_features) 텐서를 준비
+            # 자산 파일에 쌓아 둔 텐서가 있으면 그대로 사용하고, 이전 형식이면 latest_sequences에서 한 번 쌓음
+            if 'sequence_batch' in assets:
+                self.org_ids = list(assets['org_ids'])
+                self.sequence_batch = np.ascontiguousarray(assets['sequence_batch'], dtype=np.float32)
+            else:
+                self.org_ids = list(self.latest_sequences.keys())
+                if self.org_ids:
+                    self.sequence_batch = np.stack(
+                        [self.latest_sequences[org_id] for org_id in self.org_ids], axis=0
+                    ).astype(np.float32, copy=False)
+            if self.org_ids:
+                # inverse_transform을 예측마다 호출하지 않고, classes_ 배열을 한 번 인덱싱하여 보호소 이름을 미리 구해 둠
+                self.org_names = self.label_encoder.classes_[np.asarray(self.org_ids)]
             self.data_last_date = assets.get('data_last_date') # .get()으로 안전하게 로드
             self.is_loaded = True
             print("모델과 자산 로딩 완료.")
@@ -42,57 +64,76 @@ class AnimalShelterPredictor:
             print(f"모델 또는 자산 로딩 중 오류 발생: {e}")
             return False
 
+    def _build_predict_fn(self, jit_compile):
+        """
+        모델 순전파를 tf.function 그래프로 감싸 반환합니다.
+        배치 차원만 None으로 열어 두어 재추적하지 않으며, 실제 배치 크기(보호소 수)는 자산 파일로 정해지므로
+        XLA 컴파일은 보통 첫 호출에서 한 번만 일어납니다.
+        """
+        def predict_step(x):
+            return self.model(x, training=False)
+
+        return tf.function(
+            predict_step,
+            input_signature=[tf.TensorSpec(shape=(None,) + tuple(self.model.input_shape[1:]), dtype=tf.float32)],
+            jit_compile=jit_compile,
+        )
+
+    def _run_predict_fn(self, X):
+        """
+        예측 함수를 실행합니다.
+        XLA 컴파일이 불가능한 환경(예: ptxas가 없는 GPU)에서 첫 호출이 실패하면, XLA 없이 만든 그래프로 바꿔 다시 실행합니다.
+        """
+        try:
+            return self._predict_fn(X)
+        except tf.errors.OpError as e:
+            if not self._predict_fn_uses_xla:
+                raise
+            print(f"XLA 컴파일 실패로 XLA 없이 예측합니다: {e}")
+            self._predict_fn = self._build_predict_fn(jit_compile=False)
+            self._predict_fn_uses_xla = False
+            return self._predict_fn(X)
+
     def predict_all_orgs(self, start_date_str, end_date_str, progress_callback=None):
         if not self.is_loaded:
             print("오류: 모델과 자산이 로드되지 않았습니다. 먼저 load_assets()를 호출하세요.")
             return []
 
+        # 예측값은 기간과 무관하지만, 날짜 형식 검사와 빈 기간(종료일 < 시작일) 처리는 기존과 같이 유지
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        prediction_days = (end_date - start_date).days + 1
+        if end_date < start_date:
+            return []
 
-        # 1. 모든 예측 시퀀스를 한 번에 준비 (배치 처리)
-        all_sequences = []
-        org_id_map = [] # 각 시퀀스가 어떤 org_id에 해당하는지 기록
-        org_name_map = {}
+        # 1. load_assets()에서 미리 쌓아 둔 (N, seq_len, n_features) 텐서로 배치를 준비
+        org_ids = self.org_ids
+        if not org_ids:
+            return []
+        org_names = self.org_names
 
+        # 예측 기간의 모든 날짜에 같은 최신 시퀀스가 입력되어 날짜별 예측값이 동일하므로,
+        # 시퀀스를 예측일수만큼 반복하지 않고 보호소당 한 번만 예측 (기간 평균 = 그 예측값)
         print("배치 예측을 위한 데이터 준비 중...")
-        for org_id, initial_sequence in self.latest_sequences.items():
-            org_name = self.label_encoder.inverse_transform([org_id])[0]
-            org_name_map[org_id] = org_name
-            # 동일한 초기 시퀀스를 예측일수만큼 반복해서 추가
-            for _ in range(prediction_days):
-                all_sequences.append(initial_sequence)
-                org_id_map.append(org_id)
-        
-        if not all_sequences:
-            return []
+        X_predict = self.sequence_batch
 
         # 2. 모델 예측을 단 한 번만 호출
-        print(f"{len(all_sequences)}개의 시퀀스에 대한 예측을 시작합니다...")
-        X_predict = np.array(all_sequences)
-        # verbose=1로 설정하여 예측 진행 상황을 터미널에서 확인 (디버깅용)
-        predictions = self.model.predict(X_predict, verbose=1).flatten()
+        print(f"{len(X_predict)}개의 시퀀스에 대한 예측을 시작합니다...")
+        predictions = self._run_predict_fn(tf.convert_to_tensor(X_predict)).numpy().ravel()
         print("예측 완료.")
+        if progress_callback:
+            # 예측이 한 번에 끝나므로 진행률을 원소마다 갱신하지 않고 100%로 한 번만 설정
+            progress_callback(1.0)
+
+        # 3. 지역별 예측 확률(%)
+        avg_probs = predictions * 100
 
-        # 3. 예측 결과 집계
-        org_probabilities = {org_id: [] for org_id in self.latest_sequences.keys()}
-        for i, org_id in enumerate(org_id_map):
-            org_probabilities[org_id].append(predictions[i])
-            if progress_callback:
-                # 콜백은 예측 후 빠르게 진행되므로, 여기서는 100%로 바로 설정 가능
-                progress_callback((i + 1) / len(org_id_map))
+        # 4. 확률 내림차순 정렬을 NumPy에서 한 번에 수행 (stable 정렬이라 동률의 순서는 sorted(..., reverse=True)와 같음)
+        order = np.argsort(-avg_probs, kind='stable')
 
-        # 4. 지역별 평균 확률 계산
-        final_predictions = []
-        for org_id, probs in org_probabilities.items():
-            avg_prob = np.mean(probs) * 100
-            final_predictions.append({
-                'org_name': org_name_map[org_id],
-                'predicted_probability_percent': avg_prob
-            })
+        # 5. 정렬된 순서대로 결과 구성 (tolist()로 원소마다 NumPy 스칼라를 만들지 않음)
+        sorted_predictions = [
+            {'org_name': org_name, 'predicted_probability_percent': avg_prob}
+            for org_name, avg_prob in zip(org_names[order].tolist(), avg_probs[order].tolist())
+        ]
 
-        # 5. 최종 정렬
-        sorted_predictions = sorted(final_predictions, key=lambda x: x['predicted_probability_percent'], reverse=True)
-        
         return sorted_predictions
@@ -1,4 +1,4 @@
-
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 import pickle
@@ -11,76 +11,172 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(CURRENT_DIR), 'data')
 INPUT_CSV_PATH = os.path.join(DATA_DIR, 'data20230731_20250730.csv')
 OUTPUT_DIR = CURRENT_DIR
+ASSETS_PATH = os.path.join(OUTPUT_DIR, 'model_assets.pkl')
+# 전처리 결과 캐시 (원본 CSV와 마찬가지로 Git에 포함하지 않음)
+PREPROCESSED_CACHE_PATH = os.path.join(DATA_DIR, 'preprocessed_cache.pkl')
 
 SEQUENCE_LENGTH = 7  # lstm_improved.py와 동일한 시퀀스 길이
+# 전처리에 사용하는 원본 CSV 컬럼 (발생일, 보호소명)
+RAW_COLUMNS = ['happenDt', 'orgNm']
 
-def prepare_and_save_assets():
+def load_raw_data():
     """
-    모델 예측에 필요한 자산(LabelEncoder, MinMaxScaler, 최신 시퀀스)을
-    생성하고 .pkl 파일로 저장합니다.
+    원본 CSV 파일을 읽어 DataFrame으로 반환합니다.
+    전처리에 필요한 컬럼(RAW_COLUMNS)만 읽어, 나머지 컬럼은 파싱하거나 메모리에 올리지 않습니다.
     """
     print(f"데이터 로딩 시작: {INPUT_CSV_PATH}")
-    if not os.path.exists(INPUT_CSV_PATH):
-        print(f"오류: 입력 CSV 파일을 찾을 수 없습니다. 경로를 확인하세요: {INPUT_CSV_PATH}")
-        sys.exit(1)
-
+    # 보호소명은 값 종류가 적으므로 범주형으로 읽어 행마다 문자열 객체를 만들지 않음
+    read_options = dict(usecols=RAW_COLUMNS, dtype={'orgNm': 'category'}, low_memory=False)
     try:
-        df = pd.read_csv(INPUT_CSV_PATH, encoding='utf-8', low_memory=False)
+        df = pd.read_csv(INPUT_CSV_PATH, encoding='utf-8', **read_options)
     except UnicodeDecodeError:
-        df = pd.read_csv(INPUT_CSV_PATH, encoding='cp949', low_memory=False)
+        df = pd.read_csv(INPUT_CSV_PATH, encoding='cp949', **read_options)
     print("데이터 로딩 완료.")
+    return df
 
+def load_fitted_transformers():
+    """
+    기존 자산 파일(model_assets.pkl)에 저장된 LabelEncoder와 MinMaxScaler를 반환합니다.
+    배포된 .h5 모델은 이 인코딩/스케일 기준으로 학습되었으므로, 자산을 다시 만들 때도 재학습(fit)하지 않고 재사용합니다.
+    자산 파일이 없으면 (None, None)을 반환합니다.
+    """
+    if not os.path.exists(ASSETS_PATH):
+        return None, None
+    with open(ASSETS_PATH, 'rb') as f:
+        assets = pickle.load(f)
+    return assets.get('label_encoder'), assets.get('scaler')
+
+def preprocess_data(df, label_encoder=None, scaler=None):
+    """
+    원본 데이터를 날짜-보호소 단위의 학습/예측용 데이터로 가공합니다.
+    label_encoder/scaler가 주어지면 transform만 수행하고, 없으면 새로 학습합니다.
+    가공된 merged_df와 사용한 LabelEncoder, MinMaxScaler, 데이터의 마지막 날짜를 반환합니다.
+    """
     # --- 1. 데이터 전처리 (lstm_improved.py와 동일한 로직) ---
     print("데이터 전처리를 시작합니다...")
     df['happenDt'] = pd.to_datetime(df['happenDt'], format='%Y%m%d')
 
-    # LabelEncoder 생성 및 학습
-    label_encoder = LabelEncoder()
-    df['orgNm_encoded'] = label_encoder.fit_transform(df['orgNm'])
-    all_org_encoded = df['orgNm_encoded'].unique()
-
-    # 날짜-보호소 조합 생성
+    if label_encoder is None:
+        # LabelEncoder 생성 및 학습 (자산 파일과의 호환을 위해 classes_를 가진 인코더 객체는 그대로 저장)
+        label_encoder = LabelEncoder().fit(df['orgNm'])
+
+    # isin 검사 + transform(행마다 searchsorted) 대신, classes_를 범주로 하는 Categorical의 코드로 한 번에 인코딩
+    # 코드는 보호소 수에 맞는 가장 작은 정수형(int8/int16 등)이며, 인코더에 없는 보호소는 -1
+    org_codes = pd.Categorical(df['orgNm'], categories=label_encoder.classes_).codes
+    unknown = org_codes < 0
+    if unknown.any():
+        # 기존 인코더에 없는 보호소는 모델이 학습하지 않은 값이므로 제외
+        print(f"경고: 기존 LabelEncoder에 없는 보호소 {df.loc[unknown, 'orgNm'].nunique()}곳의 데이터를 제외합니다.")
+        df = df[~unknown].copy()
+        org_codes = org_codes[~unknown]
+    df['orgNm_encoded'] = org_codes
+
+    # 날짜-보호소 조합을 MultiIndex(D·O개의 Timestamp/정수 셀) + merge로 만드는 대신,
+    # (날짜 수, 보호소 수) 행렬 하나에 날짜-보호소별 발생 건수를 바로 기록
+    # 같은 날 같은 보호소에서 여러 건이 발생하면 np.add.at으로 모두 더함 (대입과 달리 중복 건수가 합쳐지지 않음)
     min_date = df['happenDt'].min()
     max_date = df['happenDt'].max()
     date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-    all_combinations = pd.MultiIndex.from_product(
-        [date_range, all_org_encoded], names=['happenDt', 'orgNm_encoded']
-    ).to_frame(index=False)
-
-    df_happen = df[['happenDt', 'orgNm_encoded']].copy()
-    df_happen['is_happened'] = 1
-
-    merged = pd.merge(all_combinations, df_happen, on=['happenDt', 'orgNm_encoded'], how='left')
-    merged['is_happened'] = merged['is_happened'].fillna(0)
+    all_org_encoded, org_idx = np.unique(df['orgNm_encoded'].to_numpy(), return_inverse=True)
+    date_idx = (df['happenDt'] - min_date).dt.days.to_numpy()
+    event_counts = np.zeros((len(date_range), len(all_org_encoded)), dtype=np.int32)
+    np.add.at(event_counts, (date_idx, org_idx), 1)
+    # 발생 여부는 기존과 같이 0/1
+    is_happened = (event_counts > 0).astype(np.int8)
+
+    # 행렬을 날짜 우선 순서로 펼쳐 long-form DataFrame으로 변환 (보호소는 인코딩 값 오름차순)
+    merged = pd.DataFrame({
+        'happenDt': date_range.repeat(len(all_org_encoded)),
+        'orgNm_encoded': np.tile(all_org_encoded, len(date_range)),
+        'is_happened': is_happened.ravel(),
+    })
     merged['orgNm_encoded_original'] = merged['orgNm_encoded']
 
     # 파생변수 추가
-    merged['weekday'] = merged['happenDt'].dt.weekday
-    merged['is_weekend'] = merged['weekday'].apply(lambda x: 1 if x >= 5 else 0)
-    merged['rolling_sum_7'] = merged.groupby('orgNm_encoded')['is_happened'].transform(
-        lambda x: x.rolling(window=7, min_periods=1).sum()
-    )
-
-    # MinMaxScaler 생성 및 학습
-    scaler = MinMaxScaler()
+    # 요일/주말 여부는 날짜만의 함수이므로 날짜 축(D개)에서 한 번 계산한 뒤 보호소 수만큼 반복
+    weekdays = date_range.weekday.to_numpy().astype(np.int8)
+    merged['weekday'] = np.repeat(weekdays, len(all_org_encoded))
+    merged['is_weekend'] = np.repeat((weekdays >= 5).astype(np.int8), len(all_org_encoded))
+    # 보호소별 최근 7일 발생 건수 합계 (같은 날의 중복 건수 포함)
+    # 그룹마다 lambda/Rolling 객체를 만드는 대신 행렬의 날짜 축 누적합에서 7일 전 누적합을 뺌
+    # (처음 6일은 누적합 그대로이므로 rolling(min_periods=1)과 동일)
+    cumsum = event_counts.cumsum(axis=0)
+    rolling_sum_7 = cumsum.copy()
+    rolling_sum_7[7:] -= cumsum[:-7]
+    merged['rolling_sum_7'] = rolling_sum_7.ravel()
+
     feature_cols_to_scale = ['orgNm_encoded', 'weekday', 'is_weekend', 'rolling_sum_7']
-    merged[feature_cols_to_scale] = scaler.fit_transform(merged[feature_cols_to_scale])
+    # 모델 입력 dtype(float32)의 연속 배열 하나로 모은 뒤, 학습된 scale_/min_으로 제자리 브로드캐스트 연산
+    # (scaler.transform과 같은 수식 X * scale_ + min_ 이지만, DataFrame 복사와 sklearn 검증 과정을 거치지 않음)
+    X = merged[feature_cols_to_scale].to_numpy(dtype=np.float32)
+    if scaler is None:
+        # MinMaxScaler 생성 및 학습 (자산 파일과의 호환을 위해 스케일러 객체는 그대로 저장)
+        scaler = MinMaxScaler().fit(X)
+    X *= scaler.scale_.astype(np.float32)
+    X += scaler.min_.astype(np.float32)
+    merged[feature_cols_to_scale] = X
     
-    merged_df = merged.sort_values(by=['happenDt', 'orgNm_encoded']).reset_index(drop=True)
+    # 행렬을 날짜 우선으로 펼쳐 만들었으므로 이미 (happenDt, orgNm_encoded) 순으로 정렬되어 있음 (별도 정렬 불필요)
+    merged_df = merged
     print("데이터 전처리 완료.")
+    return merged_df, label_encoder, scaler, max_date
+
+def load_preprocessed_data(refit=False):
+    """
+    전처리 결과를 캐시 파일에서 불러오거나, 캐시가 없거나 원본 CSV/자산 파일보다 오래되었으면
+    원본을 다시 읽어 전처리한 뒤 캐시에 저장합니다.
+    refit=True이면 캐시와 기존 LabelEncoder/MinMaxScaler를 무시하고 새로 학습합니다. (모델 재학습 시 사용)
+    """
+    if not os.path.exists(INPUT_CSV_PATH):
+        print(f"오류: 입력 CSV 파일을 찾을 수 없습니다. 경로를 확인하세요: {INPUT_CSV_PATH}")
+        sys.exit(1)
+
+    # 원본 CSV나 이 스크립트(전처리 로직)가 캐시보다 나중에 수정되었으면 캐시를 무효화
+    # 캐시에는 LabelEncoder/MinMaxScaler도 들어 있으므로, 다른 곳에서 받아 온(pull 등) 자산 파일이 더 새로우면
+    # 캐시의 이전 인코더로 자산을 덮어쓰지 않도록 함께 무효화
+    source_paths = [INPUT_CSV_PATH, os.path.abspath(__file__)]
+    if os.path.exists(ASSETS_PATH):
+        source_paths.append(ASSETS_PATH)
+    source_mtime = max(os.path.getmtime(path) for path in source_paths)
+    if not refit and os.path.exists(PREPROCESSED_CACHE_PATH) and os.path.getmtime(PREPROCESSED_CACHE_PATH) >= source_mtime:
+        print(f"전처리 캐시를 사용합니다: {PREPROCESSED_CACHE_PATH}")
+        with open(PREPROCESSED_CACHE_PATH, 'rb') as f:
+            return pickle.load(f)
+
+    label_encoder, scaler = (None, None) if refit else load_fitted_transformers()
+    if label_encoder is not None:
+        print(f"기존 자산의 LabelEncoder/MinMaxScaler를 재사용합니다: {ASSETS_PATH}")
+    preprocessed = preprocess_data(load_raw_data(), label_encoder, scaler)
+    with open(PREPROCESSED_CACHE_PATH, 'wb') as f:
+        pickle.dump(preprocessed, f)
+    return preprocessed
+
+def prepare_and_save_assets(refit=False):
+    """
+    모델 예측에 필요한 자산(LabelEncoder, MinMaxScaler, 최신 시퀀스)을
+    생성하고 .pkl 파일로 저장합니다.
+    """
+    merged_df, label_encoder, scaler, max_date = load_preprocessed_data(refit)
 
     # --- 2. 최신 시퀀스 추출 ---
     print("예측 시작을 위한 최신 시퀀스를 추출합니다...")
-    latest_sequences = {}
     feature_cols = ['is_happened', 'orgNm_encoded', 'weekday', 'is_weekend', 'rolling_sum_7']
-    
-    for org_id in all_org_encoded:
-        # 원본 org_id (스케일링 전)를 사용해야 함
-        org_data = merged_df[merged_df['orgNm_encoded_original'] == org_id].sort_values(by='happenDt')
-        if len(org_data) >= SEQUENCE_LENGTH:
-            # 마지막 N일치 데이터를 시퀀스로 저장
-            sequence = org_data[feature_cols].tail(SEQUENCE_LENGTH).values
-            latest_sequences[org_id] = sequence
+
+    # merged_df는 모든 (날짜, 보호소) 조합을 날짜 우선·보호소 오름차순으로 담은 조밀한 격자이므로,
+    # 보호소별로 행 위치를 모으지 않고 피처 배열을 (날짜 수, 보호소 수, 피처 수)로 reshape한 뒤
+    # (보호소 수, 날짜 수, 피처 수) 뷰로 바꿔 마지막 N일만 잘라냄
+    # 원본 org_id (스케일링 전)를 사용해야 함
+    num_orgs = merged_df['orgNm_encoded_original'].nunique()
+    org_ids = merged_df['orgNm_encoded_original'].to_numpy()[:num_orgs]
+    # 모델 입력 dtype(float32)으로 저장하여 자산 크기를 줄이고 예측 시 형 변환 복사를 없앰
+    features = merged_df[feature_cols].to_numpy(dtype=np.float32)
+    org_features = features.reshape(-1, num_orgs, len(feature_cols)).transpose(1, 0, 2)
+    if org_features.shape[1] >= SEQUENCE_LENGTH:
+        valid_org_ids = org_ids.tolist()
+        sequences = np.ascontiguousarray(org_features[:, -SEQUENCE_LENGTH:])
+    else:
+        valid_org_ids, sequences = [], np.empty((0, SEQUENCE_LENGTH, len(feature_cols)), dtype=np.float32)
+    latest_sequences = dict(zip(valid_org_ids, sequences))
 
     print(f"{len(latest_sequences)}개 지역의 시퀀스 추출 완료.")
 
@@ -90,15 +186,21 @@ def prepare_and_save_assets():
         'label_encoder': label_encoder,
         'scaler': scaler,
         'latest_sequences': latest_sequences,
+        # 예측 시 다시 쌓지 않도록 (보호소 수, N, 피처 수) 연속 텐서와 그 행 순서의 org_id도 함께 저장
+        'org_ids': valid_org_ids,
+        'sequence_batch': sequences,
         'data_last_date': max_date  # 데이터의 마지막 날짜 추가
     }
     
-    output_path = os.path.join(OUTPUT_DIR, 'model_assets.pkl')
-    with open(output_path, 'wb') as f:
+    with open(ASSETS_PATH, 'wb') as f:
         pickle.dump(assets, f)
+    # 방금 저장한 자산은 캐시와 같은 인코더/스케일러로 만든 것이므로, 다음 실행에서 캐시가 무효화되지 않도록 캐시 시각을 갱신
+    if os.path.exists(PREPROCESSED_CACHE_PATH):
+        os.utime(PREPROCESSED_CACHE_PATH)
         
-    print(f"성공! 모든 자산이 '{output_path}' 파일에 저장되었습니다.")
+    print(f"성공! 모든 자산이 '{ASSETS_PATH}' 파일에 저장되었습니다.")
     print("이제 이 스크립트를 다시 실행할 필요 없이, 웹 앱에서 예측 기능을 사용할 수 있습니다.")
 
 if __name__ == "__main__":
-    prepare_and_save_assets()
+    # 모델을 새로 학습하는 경우에만 `python prepare_model_assets.py --refit`으로 인코더/스케일러를 다시 학습
+    prepare_and_save_assets(refit='--refit' in sys.argv)
@@ -4,27 +4,63 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from datetime import datetime
-import numpy as np
+import re
+from utils import frame_cache_key
 
 # --- 데이터 전처리 ---
+# 정규식은 모듈 로드 시 한 번만 컴파일
+BIRTH_YEAR_PATTERN = re.compile(r'(\d{4})')
+COLOR_PATTERN = re.compile(r'(흰|검|갈|노랑|회|크림|삼색|치즈|고등어|블랙탄)')
+# 추출된 색상 키워드 → 색상 계열 (목록에 없는 값과 결측값은 '기타')
+COLOR_GROUPS = {
+    '흰': '흰', '갈': '갈', '회': '회', '크림': '크림', '삼색': '삼색', '고등어': '고등어',
+    '노랑': '치즈/노랑', '치즈': '치즈/노랑', '검': '검정/블랙탄', '블랙탄': '검정/블랙탄',
+}
+
+# 대시보드 차트에서 사용하는 원본 컬럼
+DASHBOARD_COLUMNS = ['desertion_no', 'notice_date', 'shelter_name', 'upkind_name', 'kind_name', 'age', 'process_state', 'neuter', 'color']
+AGE_GROUP_LABELS = ['1살 미만', '1-3살', '4-7살', '8살 이상']
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: frame_cache_key})
 def preprocess_for_dashboard(final_animals: pd.DataFrame) -> pd.DataFrame:
-    df = final_animals.copy()
+    # 전체 테이블을 복사하지 않고, 차트에 필요한 컬럼만 새 DataFrame으로 모은 뒤 파생 컬럼을 추가
+    df = pd.DataFrame({col: final_animals[col] for col in DASHBOARD_COLUMNS if col in final_animals.columns})
     df['notice_date'] = pd.to_datetime(df['notice_date'], errors='coerce')
     df.dropna(subset=['notice_date'], inplace=True)
 
-    df['age_str'] = df['age'].astype(str)
-    df['birth_year'] = pd.to_numeric(df['age_str'].str.extract(r'(\d{4})')[0], errors='coerce')
-    current_year = datetime.now().year
-    df['age_numeric'] = current_year - df['birth_year']
-    df.loc[df['age_numeric'] > 80, 'age_numeric'] = np.nan
+    # 나이 값은 "2023(년생)"처럼 앞 4자리가 출생연도이므로, 앞 4자리가 모두 숫자인 값은 정규식 대신 슬라이스로 추출하고,
+    # 그 외의 값('  2021', '+123(년생)' 등)은 기존과 같은 결과가 나오도록 정규식((\d{4}))으로 추출
+    # 연도 값은 float32로 충분하므로 결측값을 유지하면서 float64 대신 float32로 다운캐스트
+    age = df['age'].astype(str)
+    prefix = age.str[:4]
+    fast = prefix.str.fullmatch(r'\d{4}')
+    birth_year = pd.to_numeric(prefix.where(fast), errors='coerce', downcast='float')
+    needs_regex = ~fast & df['age'].notna()
+    if needs_regex.any():
+        # streamlit 의존성으로 항상 설치되는 pyarrow 문자열 타입을 사용해, 행마다 Python re를 호출하지 않고 Arrow 정규식 커널로 한 번에 추출
+        extracted = age[needs_regex].astype('string[pyarrow]').str.extract(BIRTH_YEAR_PATTERN.pattern, expand=False)
+        birth_year[needs_regex] = extracted.astype('float32')
+    df['birth_year'] = birth_year
+    age_numeric = datetime.now().year - birth_year
+    df['age_numeric'] = age_numeric.where(age_numeric <= 80)
+
+    # 나이대 구간은 두 차트(나이대별 현황, 나이대별 입양률)가 함께 쓰므로 한 번만 계산
+    # 마지막 구간 경계가 8 이하가 되면 구간이 단조 증가하지 않으므로 최소 9로 둠
+    if df['age_numeric'].notna().any():
+        bins = [0, 1, 3, 8, max(df['age_numeric'].max() + 1, 9)]
+        df['age_group'] = pd.cut(df['age_numeric'], bins=bins, labels=AGE_GROUP_LABELS, right=False)
+
+    # 품종은 Top 10 집계(value_counts/isin/groupby)에 반복 사용되므로 범주형으로 한 번 변환
+    # (upkind_name은 data_manager에서 이미 범주형으로 전달됨)
+    if 'kind_name' in df.columns:
+        df['kind_name'] = df['kind_name'].astype('category')
 
     df['is_adopted'] = (df['process_state'] == '종료(입양)').astype(int)
     df['is_neutered'] = (df['neuter'] == 'Y').astype(int)
 
     if 'color' in df.columns:
-        df['color_group'] = df['color'].str.extract(r'(흰|검|갈|노랑|회|크림|삼색|치즈|고등어|블랙탄)')[0]
-        df['color_group'] = df['color_group'].replace({'노랑': '치즈/노랑', '치즈': '치즈/노랑', '검': '검정/블랙탄', '블랙탄': '검정/블랙탄'})
-        df['color_group'].fillna('기타', inplace=True)
+        # 문자열에서 가장 먼저 나오는 색상 키워드를 한 번에 추출한 뒤, 사전 매핑으로 계열명 치환과 결측값 처리를 함께 수행
+        df['color_group'] = df['color'].str.extract(COLOR_PATTERN, expand=False).map(COLOR_GROUPS).fillna('기타')
     else:
         df['color_group'] = '정보 없음'
         
@@ -33,7 +69,7 @@ def preprocess_for_dashboard(final_animals: pd.DataFrame) -> pd.DataFrame:
 # --- 차트 생성 함수들 ---
 def plot_species_distribution(df: pd.DataFrame):
     st.markdown("#### 1. 축종별 보호 동물 비율")
-    species_chart_data = df.groupby("upkind_name").size().reset_index(name='count')
+    species_chart_data = df.groupby("upkind_name", observed=True).size().reset_index(name='count')
     fig = px.pie(species_chart_data, names="upkind_name", values="count", hole=0.4,
                  color="upkind_name", color_discrete_map={'개': '#FFA07A', '고양이': '#87CEFA', '기타': '#90EE90'})
     fig.update_traces(textinfo='percent+label', pull=[0.05, 0.05, 0.05])
@@ -43,9 +79,6 @@ def plot_species_distribution(df: pd.DataFrame):
 def plot_age_distribution(df: pd.DataFrame):
     st.markdown("#### 2. 나이대별 보호 현황 및 입양률")
     if df['age_numeric'].notna().any():
-        bins = [0, 1, 3, 8, df['age_numeric'].max() + 1]
-        labels = ['1살 미만', '1-3살', '4-7살', '8살 이상']
-        df['age_group'] = pd.cut(df['age_numeric'], bins=bins, labels=labels, right=False)
         age_group_stats = df.groupby('age_group').agg(total_count=('desertion_no', 'size'), adopted_count=('is_adopted', 'sum')).reset_index()
         age_group_stats['adoption_rate'] = (age_group_stats['adopted_count'] / age_group_stats['total_count'] * 100).round(1)
 
@@ -62,9 +95,10 @@ def plot_age_distribution(df: pd.DataFrame):
 def plot_kind_distribution(df: pd.DataFrame):
     st.markdown("#### 3. 품종별 보호 현황 Top 10")
     if 'kind_name' in df.columns and not df['kind_name'].empty:
-        top_10_kinds = df['kind_name'].value_counts().nlargest(10).index
+        # value_counts()는 이미 내림차순으로 정렬되어 있으므로 nlargest로 다시 선택하지 않고 앞 10개만 사용
+        top_10_kinds = df['kind_name'].value_counts().head(10).index
         df_top_10 = df[df['kind_name'].isin(top_10_kinds)]
-        kind_stats = df_top_10.groupby('kind_name').agg(total_count=('desertion_no', 'size'), adopted_count=('is_adopted', 'sum')).reset_index()
+        kind_stats = df_top_10.groupby('kind_name', observed=True).agg(total_count=('desertion_no', 'size'), adopted_count=('is_adopted', 'sum')).reset_index()
         kind_stats['adoption_rate'] = (kind_stats['adopted_count'] / kind_stats['total_count'] * 100).round(1)
         kind_stats = kind_stats.sort_values('total_count', ascending=False)
 
@@ -81,10 +115,11 @@ def plot_kind_distribution(df: pd.DataFrame):
 def plot_adoption_trend(df: pd.DataFrame):
     st.markdown("#### 4. 월별 입양률 추이")
     if 'notice_date' in df.columns and not df['notice_date'].empty:
-        adoption_df = df.copy()
-        adoption_df['month'] = adoption_df['notice_date'].dt.to_period('M').dt.to_timestamp()
-        monthly_stats = adoption_df.groupby('month').agg(total=('desertion_no', 'size'), adopted=('is_adopted', 'sum')).reset_index()
-        monthly_stats['adoption_rate'] = monthly_stats.apply(lambda row: (row['adopted'] / row['total'] * 100) if row['total'] > 0 else 0, axis=1)
+        # 월 컬럼을 추가하려고 DataFrame 전체를 복사하지 않고, 월 Series를 그룹 키로 바로 사용
+        month = df['notice_date'].dt.to_period('M').dt.to_timestamp().rename('month')
+        monthly_stats = df.groupby(month).agg(total=('desertion_no', 'size'), adopted=('is_adopted', 'sum')).reset_index()
+        # 행 단위 apply 대신 컬럼 전체를 한 번에 나누고, 보호 수가 0인 달은 0으로 처리
+        monthly_stats['adoption_rate'] = (monthly_stats['adopted'] / monthly_stats['total'] * 100).where(monthly_stats['total'] > 0, 0)
         fig = px.line(monthly_stats, x='month', y='adoption_rate', markers=True, template='plotly_white', labels={'month': '월', 'adoption_rate': '입양률 (%)'})
         fig.update_layout(margin=dict(t=10, b=10))
         st.plotly_chart(fig, use_container_width=True)
@@ -94,13 +129,19 @@ def plot_adoption_trend(df: pd.DataFrame):
 def plot_regional_heatmap(df: pd.DataFrame, filtered_shelters: pd.DataFrame):
     st.markdown("#### 5. 지역별 월별 발생 건수 (상위 10개 지역)")
     if not filtered_shelters.empty:
-        merged_data = pd.merge(df, filtered_shelters, on='shelter_name', how='left')
+        # 히트맵에는 지역과 공고월만 필요하므로, 두 테이블의 전체 컬럼 대신 필요한 컬럼만 조인
+        # 보호소명을 인덱스로 둔 region Series에 인덱스 조인하여, merge처럼 양쪽 키 컬럼으로 해시 테이블을 새로 만들지 않음
+        if 'region' in filtered_shelters.columns:
+            shelter_region = filtered_shelters.set_index('shelter_name')['region']
+            merged_data = df[['shelter_name', 'notice_date']].join(shelter_region, on='shelter_name')
+        else:
+            merged_data = pd.DataFrame()
         if 'region' in merged_data.columns and not merged_data['region'].empty:
-            top_regions = merged_data['region'].value_counts().nlargest(10).index
-            df_top_regions = merged_data[merged_data['region'].isin(top_regions)].copy()
-            df_top_regions['month'] = df_top_regions['notice_date'].dt.month
-            available_months = sorted(df_top_regions['month'].unique())
-            region_month_counts = df_top_regions.groupby(['region', 'month']).size().unstack(fill_value=0).reindex(columns=available_months, fill_value=0)
+            top_regions = merged_data['region'].value_counts().head(10).index
+            df_top_regions = merged_data[merged_data['region'].isin(top_regions)]
+            month = df_top_regions['notice_date'].dt.month.rename('month')
+            available_months = sorted(month.unique())
+            region_month_counts = df_top_regions.groupby([df_top_regions['region'], month]).size().unstack(fill_value=0).reindex(columns=available_months, fill_value=0)
             if not region_month_counts.empty:
                 fig = px.imshow(region_month_counts, labels=dict(x="월", y="지역명", color="발생 건수"), x=[f'{i}월' for i in available_months], y=region_month_counts.index, text_auto=True, aspect="auto", color_continuous_scale='YlGnBu')
                 fig.update_layout(title_text='월별 유기동물 발생 건수 히트맵', title_x=0.5, margin=dict(t=80, b=10), xaxis=dict(side='top', title=None))
@@ -123,10 +164,6 @@ def plot_age_adoption_correlation(df: pd.DataFrame):
             st.plotly_chart(fig_age_box, use_container_width=True)
         with col2:
             st.markdown("**나이대별 입양률**")
-            if 'age_group' not in df.columns:
-                bins = [0, 1, 3, 8, df['age_numeric'].max() + 1]
-                labels = ['1살 미만', '1-3살', '4-7살', '8살 이상']
-                df['age_group'] = pd.cut(df['age_numeric'], bins=bins, labels=labels, right=False)
             age_adoption_rate = df.groupby('age_group')['is_adopted'].mean().reset_index()
             age_adoption_rate['adoption_rate_pct'] = (age_adoption_rate['is_adopted'] * 100).round(1)
             fig_age_bar = px.bar(age_adoption_rate, x='age_group', y='adoption_rate_pct', text='adoption_rate_pct', template='plotly_white', labels={'age_group': '나이대', 'adoption_rate_pct': '입양률 (%)'})
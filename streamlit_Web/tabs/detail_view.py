@@ -1,8 +1,10 @@
-
 import streamlit as st
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from data_manager import load_data
-from ui_components import render_animal_card, render_download_button
+from ui_components import resolve_animal_image_src, render_download_button, PLACEHOLDER_IMAGE, SEX_DISPLAY
 
 @st.cache_data
 def get_animal_details(shelter_name: str) -> pd.DataFrame:
@@ -12,6 +14,94 @@ def get_animal_details(shelter_name: str) -> pd.DataFrame:
         return pd.DataFrame()
     return animals_df[animals_df['shelter_name'] == shelter_name]
 
+# 표에서 사용하는 원본 컬럼과, 컬럼이 없을 때의 기본값 (기존 카드 렌더링의 .get(...) 기본값과 동일)
+TABLE_COLUMN_DEFAULTS = {
+    'desertion_no': None, 'image_url': None, 'kind_name': None, 'notice_no': None,
+    'age': '정보 없음', 'weight': '정보 없음', 'sex': 'U',
+    'special_mark': '정보 없음', 'happen_place': '정보 없음',
+}
+IMAGE_FETCH_WORKERS = 8
+
+def fetch_image_sources(image_urls: list) -> dict:
+    """
+    이미지 URL별로 표에 표시할 src를 {url: src} 형태로 반환합니다.
+    https URL은 그대로 ImageColumn에 넘겨 브라우저가 직접 받아 오게 하고,
+    base64 프록시가 필요한 URL만 서버에서 받습니다. (같은 사진은 한 번만, 서로 다른 사진은 스레드 풀로 병렬로)
+    """
+    proxied = [url for url in image_urls if not str(url).startswith("https://")]
+    sources = {url: resolve_animal_image_src(url) for url in image_urls if str(url).startswith("https://")}
+    if proxied:
+        # 작업 스레드에서도 캐시(fetch_image_as_base64)가 현재 세션의 실행 컨텍스트를 사용하도록 연결
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+            sources.update(zip(proxied, executor.map(resolve_animal_image_src, proxied)))
+    return sources
+
+def build_animal_table(animal_details: pd.DataFrame, favorites: set) -> pd.DataFrame:
+    """
+    동물 목록을 표 하나로 보여주기 위한 표시용 컬럼을 행 단위 반복 없이 만듭니다.
+    일부 컬럼이 없는 데이터도 기존 카드처럼 기본값으로 표시합니다.
+    """
+    missing_defaults = {col: default for col, default in TABLE_COLUMN_DEFAULTS.items() if col not in animal_details.columns}
+    details = animal_details.reindex(columns=list(TABLE_COLUMN_DEFAULTS)).assign(**missing_defaults)
+
+    # https 이미지는 브라우저가 직접 받고, 그 외는 기존 카드와 같이 base64 프록시로 표시 (프록시 결과는 캐시됨)
+    image_sources = fetch_image_sources(details['image_url'].dropna().unique().tolist())
+    images = details['image_url'].map(image_sources).fillna(PLACEHOLDER_IMAGE)
+
+    return pd.DataFrame({
+        'image': images,
+        'display_name': details['kind_name'].fillna(details['notice_no']).fillna('이름 없음'),
+        'age': details['age'],
+        'weight': details['weight'],
+        'sex_display': details['sex'].map(SEX_DISPLAY).fillna("성별 미상"),
+        'special_mark': details['special_mark'],
+        'happen_place': details['happen_place'],
+        'fav': details['desertion_no'].isin(favorites),
+    })
+
+@st.fragment
+def render_animal_table(animal_details: pd.DataFrame, shelter_name: str):
+    """
+    보호소의 동물 목록을 st.data_editor 하나로 렌더링합니다.
+    동물마다 컬럼/이미지/마크다운/버튼 위젯을 만드는 대신, 찜하기는 체크박스 컬럼의 변경분으로 한 번에 반영합니다.
+    체크박스 편집은 먼저 이 fragment만 다시 실행하고, 찜 목록이 바뀐 경우에만 앱 전체를 다시 실행하여 찜 개수 등을 갱신합니다.
+    """
+    favorites = st.session_state.favorites
+    table = build_animal_table(animal_details, favorites)
+    editor_key = f"animal_table_{shelter_name}"
+
+    edited = st.data_editor(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        key=editor_key,
+        disabled=[col for col in table.columns if col != 'fav'],
+        column_config={
+            "image": st.column_config.ImageColumn("사진"),
+            "display_name": "이름",
+            "age": "나이",
+            "weight": "체중",
+            "sex_display": "성별",
+            "special_mark": "🐾 특징",
+            "happen_place": "📍 발견 장소",
+            "fav": st.column_config.CheckboxColumn("❤️ 찜"),
+        },
+    )
+
+    changed = edited['fav'] != table['fav']
+    if changed.any():
+        for desertion_no, is_favorited in zip(animal_details.reindex(columns=['desertion_no']).loc[changed, 'desertion_no'], edited.loc[changed, 'fav']):
+            if pd.isna(desertion_no):
+                continue
+            if is_favorited:
+                favorites.add(desertion_no)
+            else:
+                favorites.discard(desertion_no)
+        # 반영한 편집 내역을 지워, 다른 탭에서 찜 목록이 바뀌어도 이전 체크 상태가 다시 적용되지 않게 함
+        del st.session_state[editor_key]
+        st.rerun()
+
 def show(filtered_shelters: pd.DataFrame):
     st.subheader("📋 보호소 상세 현황")
 
@@ -33,8 +123,7 @@ def show(filtered_shelters: pd.DataFrame):
     st.markdown(f"**📞 연락처:** {shelter_tel}")
     st.markdown("---")
 
-    for _, animal in animal_details.iterrows():
-        render_animal_card(animal, context="details")
+    render_animal_table(animal_details, shelter_name)
 
     if not animal_details.empty:
         render_download_button(animal_details, shelter_name)
@@ -1,43 +1,60 @@
-
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
 import pandas as pd
 from folium.plugins import MarkerCluster
+from utils import frame_cache_key
+
+def _column_values(df: pd.DataFrame, col: str, default) -> list:
+    """컬럼 값을 리스트로 반환합니다. 컬럼이 없으면 기본값으로 채운 리스트를 반환합니다."""
+    return df[col].tolist() if col in df.columns else [default] * len(df)
 
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: frame_cache_key})
 def create_map(filtered_shelters: pd.DataFrame, filtered_animals: pd.DataFrame) -> folium.Map:
-    """Folium 지도를 생성하고 마커를 추가합니다."""
+    """
+    Folium 지도를 생성하고 마커를 추가합니다.
+    필터 결과가 같으면 마커를 다시 만들지 않도록 지도 객체를 캐시합니다. (복사/직렬화가 필요 없는 cache_resource 사용)
+    """
     if filtered_shelters.empty:
         return folium.Map(location=[36.5, 127.5], zoom_start=7)
 
     shelter_image_map = {}
     if not filtered_animals.empty and 'image_url' in filtered_animals.columns:
-        shelter_image_map = filtered_animals.groupby('shelter_name')['image_url'].first().to_dict()
+        shelter_image_map = filtered_animals.groupby('shelter_name', observed=True)['image_url'].first().to_dict()
 
-    valid_lat = filtered_shelters['lat'].dropna()
-    valid_lon = filtered_shelters['lon'].dropna()
-    map_center = [valid_lat.mean(), valid_lon.mean()] if not valid_lat.empty else [37.5665, 126.9780]
+    # 위도/경도 평균을 한 번에 계산 (컬럼별로 결측값은 제외)
+    lat_mean, lon_mean = filtered_shelters[['lat', 'lon']].mean().tolist()
+    map_center = [lat_mean, lon_mean] if filtered_shelters['lat'].notna().any() else [37.5665, 126.9780]
 
     map_obj = folium.Map(location=map_center, zoom_start=7)
     marker_cluster = MarkerCluster().add_to(map_obj)
 
-    for _, row in filtered_shelters.iterrows():
-        if pd.notna(row['lat']) and pd.notna(row['lon']):
-            image_url = shelter_image_map.get(row['shelter_name'], "https://via.placeholder.com/150?text=사진+없음")
-            popup_html = f"""
-                <b>{row['shelter_name']}</b><br>
-                <img src='{image_url}' width='150'><br>
-                지역: {row.get('region', '정보 없음')}<br>
-                주요 품종: {row.get('kind_name', '정보 없음')}<br>
-                보호 중: {int(row.get('count', 0))} 마리
-            """
-            folium.Marker(
-                [row['lat'], row['lon']],
-                popup=popup_html,
-                tooltip=row['shelter_name'],
-                icon=folium.Icon(color="blue", icon="paw", prefix='fa')
-            ).add_to(marker_cluster)
-            
+    # 좌표가 있는 보호소만 남긴 뒤, 행마다 Series를 만드는 iterrows 대신 컬럼 리스트를 zip하여 순회
+    located = filtered_shelters[filtered_shelters['lat'].notna() & filtered_shelters['lon'].notna()]
+    rows = zip(
+        located['shelter_name'].tolist(),
+        located['lat'].tolist(),
+        located['lon'].tolist(),
+        _column_values(located, 'region', '정보 없음'),
+        _column_values(located, 'kind_name', '정보 없음'),
+        _column_values(located, 'count', 0),
+    )
+    for shelter_name, lat, lon, region, kind_name, count in rows:
+        image_url = shelter_image_map.get(shelter_name, "https://via.placeholder.com/150?text=사진+없음")
+        popup_html = f"""
+            <b>{shelter_name}</b><br>
+            <img src='{image_url}' width='150'><br>
+            지역: {region}<br>
+            주요 품종: {kind_name}<br>
+            보호 중: {int(count)} 마리
+        """
+        folium.Marker(
+            [lat, lon],
+            popup=popup_html,
+            tooltip=shelter_name,
+            icon=folium.Icon(color="blue", icon="paw", prefix='fa')
+        ).add_to(marker_cluster)
+
     return map_obj
 
 def render_shelter_table(filtered_shelters: pd.DataFrame):
@@ -70,14 +87,13 @@ def handle_map_click(map_event):
             st.session_state.next_tab = "📋 보호소 상세 현황"
             st.rerun()
 
-def show(filtered_shelters: pd.DataFrame, filtered_animals: pd.DataFrame):
-    """지도 및 분석 탭의 전체 UI를 표시합니다."""
-    st.subheader("🗺️ 보호소 지도")
-
-    if filtered_shelters.empty:
-        st.warning("표시할 데이터가 없습니다. 필터 조건을 변경해보세요.")
-        return
-
+@st.fragment
+def render_map(filtered_shelters: pd.DataFrame, filtered_animals: pd.DataFrame):
+    """
+    보호소 지도를 렌더링합니다.
+    지도 이동/확대 등 지도 이벤트로 인한 재실행은 이 fragment 안에서만 일어나고,
+    보호소를 클릭해 탭을 전환할 때만 handle_map_click의 st.rerun()으로 앱 전체를 다시 실행합니다.
+    """
     map_obj = create_map(filtered_shelters, filtered_animals)
     
     map_event = None
@@ -88,4 +104,14 @@ def show(filtered_shelters: pd.DataFrame, filtered_animals: pd.DataFrame):
         pass
 
     handle_map_click(map_event)
+
+def show(filtered_shelters: pd.DataFrame, filtered_animals: pd.DataFrame):
+    """지도 및 분석 탭의 전체 UI를 표시합니다."""
+    st.subheader("🗺️ 보호소 지도")
+
+    if filtered_shelters.empty:
+        st.warning("표시할 데이터가 없습니다. 필터 조건을 변경해보세요.")
+        return
+
+    render_map(filtered_shelters, filtered_animals)
     render_shelter_table(filtered_shelters)
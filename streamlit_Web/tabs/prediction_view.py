@@ -1,4 +1,3 @@
-
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
@@ -18,11 +17,12 @@ if lstm_model_path not in sys.path:
 from lstm_improved import AnimalShelterPredictor
 
 # --- 모델 로더 ---
-@st.cache_resource
+@st.cache_resource(show_spinner="모델 로딩 중...")
 def load_predictor():
     """
     예측 모델과 관련 자산(.pkl)을 로드합니다.
     이 함수는 앱 세션 동안 단 한 번만 실행됩니다.
+    로딩에 실패하면 None을 반환하며, 오류 메시지는 캐시된 함수 밖(show)에서 표시합니다.
     """
     model_path = os.path.join(lstm_model_path, 'lstm_model_animal_shelter_improved.h5')
     assets_path = os.path.join(lstm_model_path, 'model_assets.pkl')
@@ -30,11 +30,19 @@ def load_predictor():
     predictor = AnimalShelterPredictor(model_path=model_path, assets_path=assets_path)
     
     if not predictor.load_assets():
-        st.error("예측에 필요한 모델 또는 자산 파일 로딩에 실패했습니다. model_assets.pkl 파일이 존재하는지 확인하세요.")
         return None
         
     return predictor
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def run_prediction(start_date_str: str, end_date_str: str, _predictor):
+    """
+    예측 기간별 전체 지역 예측 결과를 캐싱합니다.
+    같은 기간을 다시 예측하거나 표시 범위(상위 N개)만 바꿀 때는 모델을 다시 실행하지 않습니다.
+    _predictor는 캐시 키에서 제외됩니다(이름 앞 '_').
+    """
+    return _predictor.predict_all_orgs(start_date_str=start_date_str, end_date_str=end_date_str)
+
 # --- UI 렌더링 함수 ---
 def render_prediction_form():
     """사용자로부터 예측에 필요한 입력을 받는 UI 폼을 렌더링합니다."""
@@ -70,21 +78,12 @@ def display_prediction_results(predictions, display_option, start_date, end_date
 
     st.table(pred_df.style.format({'평균 발생 확률 (%)': '{:.2f}%'}))
 
-# --- 메인 함수 ---
-def show():
-    st.header("🔮 미래 유기동물 발생 예측")
-    
-    predictor = load_predictor()
-    if predictor is None:
-        return
-
-    # 데이터 마지막 날짜를 가져와 설명에 포함
-    if predictor.is_loaded and hasattr(predictor, 'data_last_date'):
-        last_date_str = predictor.data_last_date.strftime("%Y년 %m월 %d일")
-        st.write(f"선택한 예측 기간 동안 유기동물 발생 가능성이 높은 지역을 예측합니다. (데이터 기준: ~{last_date_str})")
-    else:
-        st.write("선택한 예측 기간 동안 유기동물 발생 가능성이 높은 지역을 예측합니다.")
-
+@st.fragment
+def render_prediction_panel(predictor):
+    """
+    예측 옵션 선택, 실행 버튼, 결과 표시를 렌더링합니다.
+    옵션을 바꾸거나 버튼을 눌러도 앱 전체(헤더, 필터링, KPI 등)가 아닌 이 fragment만 다시 실행됩니다.
+    """
     display_option, period_option = render_prediction_form()
 
     if st.button("예측 실행", key="predict_button"):
@@ -96,13 +95,16 @@ def show():
         prediction_end_date = prediction_start_date + timedelta(days=days - 1)
 
         progress_bar = st.progress(0, text="LSTM 모델을 이용하여 예측 중입니다...")
-        
+
         try:
-            predictions = predictor.predict_all_orgs(
-                start_date_str=prediction_start_date.strftime('%Y-%m-%d'),
-                end_date_str=prediction_end_date.strftime('%Y-%m-%d'),
-                progress_callback=lambda p: progress_bar.progress(p, text=f"예측 진행률: {p:.0%}")
+            predictions = run_prediction(
+                prediction_start_date.strftime('%Y-%m-%d'),
+                prediction_end_date.strftime('%Y-%m-%d'),
+                predictor,
             )
+            # 예측은 한 번의 배치 호출로 끝나므로(기존 progress_callback도 완료 시 100%로 설정),
+            # 캐시 함수 안에서 바깥 요소를 갱신하지 않고 결과를 받은 뒤 진행률을 채움 (캐시 적중 시에도 동일)
+            progress_bar.progress(1.0, text="예측 진행률: 100%")
             if predictions:
                 display_prediction_results(predictions, display_option, prediction_start_date, prediction_end_date)
             else:
@@ -111,3 +113,23 @@ def show():
             st.error(f"예측 중 오류가 발생했습니다: {e}")
         finally:
             progress_bar.empty()
+
+# --- 메인 함수 ---
+def show():
+    st.header("🔮 미래 유기동물 발생 예측")
+    
+    predictor = load_predictor()
+    if predictor is None:
+        st.error("예측에 필요한 모델 또는 자산 파일 로딩에 실패했습니다. model_assets.pkl 파일이 존재하는지 확인하세요.")
+        # 로딩 실패(None)가 세션 내내 캐시되지 않도록 비워, 자산 파일을 만든 뒤 앱 재시작 없이 다시 시도되게 함
+        load_predictor.clear()
+        return
+
+    # 데이터 마지막 날짜를 가져와 설명에 포함
+    if predictor.is_loaded and hasattr(predictor, 'data_last_date'):
+        last_date_str = predictor.data_last_date.strftime("%Y년 %m월 %d일")
+        st.write(f"선택한 예측 기간 동안 유기동물 발생 가능성이 높은 지역을 예측합니다. (데이터 기준: ~{last_date_str})")
+    else:
+        st.write("선택한 예측 기간 동안 유기동물 발생 가능성이 높은 지역을 예측합니다.")
+
+    render_prediction_panel(predictor)
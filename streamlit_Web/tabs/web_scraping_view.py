@@ -1,24 +1,88 @@
-
-
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
 from utils import get_db_config
 import math
 import json
 import plotly.express as px
+from typing import Tuple
+
+PAGE_SIZE = 10
+# JSON 문자열로 저장된 컬럼
+JSON_COLUMNS = ["태그", "임보 조건", "히스토리", "건강 정보"]
+# 시각화 탭에서 '현재 상태'를 정할 때 태그를 확인하는 우선순위
+STATUS_PRIORITY = ['공고종료', '입양완료', '임보중']
 
 # --- 데이터 로딩 ---
-@st.cache_data
-def load_scraped_data(table_name: str) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False)
+def _create_engine():
+    """
+    스크래핑 데이터용 SQLAlchemy 엔진을 프로세스당 한 번만 생성하여 커넥션 풀을 재사용합니다.
+    (config.ini 오류 등으로 예외가 나면 캐시되지 않고 다음 호출에서 다시 시도)
+    """
+    db_config = get_db_config()
+    return create_engine(f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}@"
+                         f"{db_config['host']}:{db_config['port']}/{db_config['database']}?charset=utf8mb4")
+
+def _build_filter_clause(search_name: str, selected_tag: str) -> Tuple[str, dict]:
+    """이름/태그 검색 조건을 SQL WHERE 절과 바인딩 파라미터로 변환합니다."""
+    conditions, params = [], {}
+    if search_name:
+        # LIKE 와일드카드 문자는 이스케이프하여 입력한 문자열 그대로 부분 일치 검색
+        escaped = search_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("`이름` LIKE :name")
+        params["name"] = f"%{escaped}%"
+    if selected_tag and selected_tag != "전체":
+        # 태그는 JSON 배열 문자열로 저장되어 있으므로, 따옴표로 감싼 태그 값이 포함된 행을 찾음
+        conditions.append("`태그` LIKE :tag")
+        params["tag"] = f'%"{selected_tag}"%'
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _order_by_clause(table_name: str) -> str:
+    """
+    페이지 조회에 사용할 ORDER BY 절을 반환합니다.
+    ORDER BY 없이 LIMIT/OFFSET을 쓰면 실행 계획에 따라 페이지 사이에 행이 중복되거나 빠질 수 있으므로 순서를 고정합니다.
+    update_web_data.py가 저장한 id 컬럼이 있으면 id로, 이전 형식의 테이블이면 사이트링크와 이름으로 정렬합니다.
+    """
+    columns = {col["name"] for col in inspect(_create_engine()).get_columns(table_name)}
+    if "id" in columns:
+        return " ORDER BY `id`"
+    return " ORDER BY `사이트링크`, `이름`"
+
+@st.cache_data(ttl=600, show_spinner=False)
+def count_scraped_rows(table_name: str, search_name: str, selected_tag: str) -> int:
+    """검색 조건에 맞는 행 수를 DB에서 바로 셉니다."""
+    where, params = _build_filter_clause(search_name, selected_tag)
     try:
-        db_config = get_db_config()
-        engine = create_engine(f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}@"
-                               f"{db_config['host']}:{db_config['port']}/{db_config['database']}?charset=utf8mb4")
-        return pd.read_sql(f"SELECT * FROM {table_name}", engine)
+        with _create_engine().connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}{where}"), params).scalar() or 0
     except Exception as e:
-        st.error(f"{table_name} 데이터 로딩 중 오류 발생: {e}")
+        st.error(f"{table_name} 데이터 조회 중 오류 발생: {e}")
+        return 0
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_scraped_page(table_name: str, search_name: str, selected_tag: str, page: int) -> pd.DataFrame:
+    """
+    검색 조건에 맞는 행 중 한 페이지(PAGE_SIZE개)만 DB에서 가져옵니다.
+    필터링과 페이지 나누기를 SQL에서 처리하여, 화면에 표시할 행만 읽어 옵니다.
+    """
+    where, params = _build_filter_clause(search_name, selected_tag)
+    params.update(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    try:
+        order_by = _order_by_clause(table_name)
+        with _create_engine().connect() as conn:
+            page_data = pd.read_sql(text(f"SELECT * FROM {table_name}{where}{order_by} LIMIT :limit OFFSET :offset"), conn, params=params)
+    except Exception as e:
+        st.error(f"{table_name} 데이터 조회 중 오류 발생: {e}")
         return pd.DataFrame()
+    # JSON 문자열 컬럼은 여기서 컬럼 단위로 한 번만 디코딩하여 캐시 (카드를 다시 그릴 때마다 파싱하지 않음)
+    for col in JSON_COLUMNS:
+        if col in page_data.columns:
+            page_data[col] = page_data[col].map(safe_json_loads)
+    return page_data
 
 # --- 데이터 처리 ---
 def safe_json_loads(s):
@@ -27,12 +91,29 @@ def safe_json_loads(s):
     except (json.JSONDecodeError, TypeError):
         return []
 
-def filter_data(data: pd.DataFrame, search_name: str, selected_tag: str) -> pd.DataFrame:
-    if search_name:
-        data = data[data["이름"].str.contains(search_name, case=False, na=False)]
-    if selected_tag and selected_tag != "전체":
-        data = data[data["태그"].apply(lambda x: selected_tag in safe_json_loads(x))]
-    return data
+@st.cache_data(ttl=600, show_spinner=False)
+def count_scraped_status(table_name: str) -> pd.Series:
+    """
+    '현재 상태'별 개체 수를 계산하여 캐시합니다.
+    차트는 이 작은 집계 결과만 사용하므로, 다시 그릴 때마다 전체 테이블의 태그를 검사하지 않습니다.
+    """
+    # 상태 분류에는 태그만 필요하므로 전체 컬럼 대신 태그 컬럼만 읽어 옴
+    try:
+        with _create_engine().connect() as conn:
+            data = pd.read_sql(text(f"SELECT `태그` FROM {table_name}"), conn)
+    except Exception as e:
+        st.error(f"{table_name} 데이터 로딩 중 오류 발생: {e}")
+        return pd.Series(dtype='int64')
+    if data.empty:
+        return pd.Series(dtype='int64')
+
+    # 행마다 JSON을 디코딩하는 대신, JSON 배열 문자열에 따옴표로 감싼 태그가 있는지 열 단위로 검사한 뒤
+    # 우선순위(STATUS_PRIORITY) 순서대로 np.select로 상태를 결정 (해당 없으면 '임보가능')
+    # 캐시된 원본 DataFrame에 컬럼을 추가하지 않고 별도 Series로 계산
+    tag_text = data['태그'].astype(str)
+    status_masks = [tag_text.str.contains(f'"{status}"', regex=False) for status in STATUS_PRIORITY]
+    status = pd.Series(np.select(status_masks, STATUS_PRIORITY, default='임보가능'), name='현재 상태')
+    return status.value_counts()
 
 # --- UI 렌더링 함수 ---
 def render_status_description():
@@ -48,11 +129,12 @@ def render_animal_card(row: pd.Series):
     몸무게 = row.get('몸무게', '정보 없음')
     st.markdown(f"**출생:** {출생}   |   **몸무게:** {몸무게}")
 
-    tags = safe_json_loads(row.get("태그", "[]"))
+    # JSON 컬럼은 load_scraped_page에서 이미 디코딩됨
+    tags = row.get("태그", [])
     st.markdown(f"**임보 상태:** {', '.join(tags) if tags else '정보 없음'}")
 
     st.markdown("### 🏠 임보 조건")
-    conditions = safe_json_loads(row.get("임보 조건", "{}"))
+    conditions = row.get("임보 조건", {})
     if isinstance(conditions, dict) and conditions:
         st.markdown(f"- 지역: {conditions.get('지역', '정보 없음')}")
         st.markdown(f"- 임보 기간: {conditions.get('임보 기간', '정보 없음')}")
@@ -69,7 +151,7 @@ def render_animal_card(row: pd.Series):
         st.markdown("- 정보 없음")
 
     st.markdown("### 📜 구조 이력")
-    history = safe_json_loads(row.get("히스토리", "{}"))
+    history = row.get("히스토리", {})
     if isinstance(history, dict) and history:
         for date, event in history.items():
             st.markdown(f"- {date}: {event}")
@@ -77,7 +159,7 @@ def render_animal_card(row: pd.Series):
         st.markdown("- 정보 없음")
 
     st.markdown("### 🩺 건강 정보")
-    health = safe_json_loads(row.get("건강 정보", "{}"))
+    health = row.get("건강 정보", {})
     if isinstance(health, dict) and health:
         st.markdown(f"- 접종 현황: {health.get('접종 현황', '정보 없음')}")
         st.markdown(f"- 검사 현황: {health.get('검사 현황', '정보 없음')}")
@@ -92,41 +174,31 @@ def render_animal_card(row: pd.Series):
 
     st.divider()
 
-def render_animal_info_tab(animal_type: str, data: pd.DataFrame):
+def render_animal_info_tab(animal_type: str, table_name: str):
     st.sidebar.subheader(f"🔍 {animal_type} 검색 / 필터")
     search_name = st.sidebar.text_input(f"이름으로 검색", key=f"{animal_type}_search")
     tag_options = ["전체", "임보가능", "입양전제", "임보중", "일반임보"]
     selected_tag = st.sidebar.selectbox(f"태그 필터", tag_options, key=f"{animal_type}_tag")
 
-    filtered = filter_data(data, search_name, selected_tag)
-    if filtered.empty:
+    total_count = count_scraped_rows(table_name, search_name, selected_tag)
+    if total_count == 0:
         st.warning("검색 결과가 없습니다.")
         return
 
-    total_pages = math.ceil(len(filtered) / 10)
+    total_pages = math.ceil(total_count / PAGE_SIZE)
     page = st.selectbox(f"{animal_type} 페이지 선택", options=list(range(1, total_pages + 1)), key=f"{animal_type}_page")
-    
-    start = (page - 1) * 10
-    end = start + 10
-    for _, row in filtered.iloc[start:end].iterrows():
+
+    page_data = load_scraped_page(table_name, search_name, selected_tag, page)
+    for _, row in page_data.iterrows():
         render_animal_card(row)
 
-def render_visualization_tab(animal_type: str, data: pd.DataFrame):
+def render_visualization_tab(animal_type: str, table_name: str):
     st.subheader(f"{animal_type} 데이터 시각화")
-    if data.empty:
+    status_counts = count_scraped_status(table_name)
+    if status_counts.empty:
         st.info(f"{animal_type} 데이터가 없습니다.")
         return
 
-    def classify_status(tag_str):
-        tags = safe_json_loads(tag_str)
-        if '공고종료' in tags: return '공고종료'
-        if '입양완료' in tags: return '입양완료'
-        if '임보중' in tags: return '임보중'
-        return '임보가능'
-
-    data['현재 상태'] = data['태그'].apply(classify_status)
-    status_counts = data['현재 상태'].value_counts()
-
     color_map = {
         '임보가능': '#1f77b4',  # Muted Blue
         '임보중': '#ff7f0e',   # Safety Orange
@@ -156,17 +228,13 @@ def show():
     with main_tab1:
         cat_tab, dog_tab = st.tabs(["🐱 고양이", "🐶 강아지"])
         with cat_tab:
-            cats_data = load_scraped_data("web_cats")
-            render_animal_info_tab("고양이", cats_data)
+            render_animal_info_tab("고양이", "web_cats")
         with dog_tab:
-            dogs_data = load_scraped_data("web_dogs")
-            render_animal_info_tab("강아지", dogs_data)
+            render_animal_info_tab("강아지", "web_dogs")
 
     with main_tab2:
         cat_viz_tab, dog_viz_tab = st.tabs(["🐱 고양이", "🐶 강아지"])
         with cat_viz_tab:
-            cats_data = load_scraped_data("web_cats")
-            render_visualization_tab("고양이", cats_data)
+            render_visualization_tab("고양이", "web_cats")
         with dog_viz_tab:
-            dogs_data = load_scraped_data("web_dogs")
-            render_visualization_tab("강아지", dogs_data)
+            render_visualization_tab("강아지", "web_dogs")
@@ -1,13 +1,19 @@
 import streamlit as st
 from datetime import datetime, timedelta
-from utils import get_image_as_base64
 import os
+from urllib.parse import quote
 import pandas as pd
 import requests
 import base64
+import html
+import io
 
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=256)
 def fetch_image_as_base64(url):
-    """이미지 URL을 요청해 base64로 인코딩된 문자열 반환"""
+    """
+    이미지 URL을 요청해 base64로 인코딩된 문자열 반환
+    이미지 전체를 문자열로 보관하므로, 모든 세션이 공유하는 캐시의 항목 수를 제한하여 서버 메모리 사용량을 묶어 둠
+    """
     try:
         response = requests.get(url, timeout=3)
         if response.status_code == 200:
@@ -15,18 +21,21 @@ def fetch_image_as_base64(url):
     except:
         return None
 
+# 헤더 로고는 Streamlit 정적 파일(static/, .streamlit/config.toml의 enableStaticServing)로 제공
+# base64로 HTML에 인라인하지 않으므로 재실행마다 이미지 데이터를 전송하지 않고, 브라우저가 URL 기준으로 캐시함
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_FILENAME = "HelloHome_ICON_투명.png"
+LOGO_URL = f"app/static/{quote(LOGO_FILENAME)}" if os.path.exists(os.path.join(CURRENT_DIR, "static", LOGO_FILENAME)) else None
+
 def render_header():
     """
     애플리케이션의 헤더(로고와 제목)를 렌더링합니다.
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    logo_path = os.path.join(current_dir, "data", "HelloHome_ICON_투명.png")
-    logo_base64 = get_image_as_base64(logo_path)
 
     st.markdown(f"""
     <div style="text-align: center; padding: 2rem 0 2.5rem 0;">
         <div style='display: flex; align-items: center; justify-content: center; margin-bottom: 0.75rem;'>
-            {f'<img src="data:image/png;base64,{logo_base64}" style="height: 4.1rem; margin-right: 15px;">' if logo_base64 else ''}
+            {f'<img src="{LOGO_URL}" style="height: 4.1rem; margin-right: 15px;">' if LOGO_URL else ''}
             <h1 style='color: #212529; font-weight: 800; font-size: 4.1rem; margin: 0;'>Hello Home</h1>
         </div>
         <p style='color: #495057; font-size: 1.25rem; margin: 0;'>
@@ -35,7 +44,7 @@ def render_header():
     </div>
     """, unsafe_allow_html=True)
 
-def render_sidebar(sido_list):
+def render_sidebar(sido_names, sido_codes):
     """
     사이드바 필터를 렌더링합니다. 필터 값은 st.session_state를 통해 관리됩니다.
     """
@@ -57,48 +66,48 @@ def render_sidebar(sido_list):
             help="선택하지 않으면 전체 축종이 포함됩니다."
         )
 
-    sido_names = ["전체"] + [s['name'] for s in sido_list]
     with st.sidebar.expander("📍 지역 선택", expanded=True):
         st.selectbox("시도 선택", sido_names, key="sido_filter", on_change=on_sido_change)
         
         if st.session_state.sido_filter != "전체":
-            selected_sido_code = next((s['code'] for s in sido_list if s['name'] == st.session_state.sido_filter), None)
+            selected_sido_code = sido_codes.get(st.session_state.sido_filter)
             if selected_sido_code:
-                from data_manager import get_sigungu_list
-                sigungu_list = get_sigungu_list(selected_sido_code)
-                sigungu_names = ["전체"] + [s['name'] for s in sigungu_list]
+                from data_manager import get_sigungu_names
+                sigungu_names = get_sigungu_names(selected_sido_code)
                 st.selectbox("시군구 선택", sigungu_names, key="sigungu_filter")
 
+# KPI 카드 한 장의 HTML 템플릿 (재실행마다 f-string을 다시 만들지 않도록 모듈 상수로 둠)
+KPI_CARD_TEMPLATE = (
+    '<div class="kpi-card">'
+    '<div class="icon">{icon}</div>'
+    '<div class="title">{title}</div>'
+    '<div class="number">{number}</div>'
+    '</div>'
+)
+
 def render_kpi_cards(shelter_count, animal_count, long_term_count, adopted_count):
     """
     KPI 카드를 렌더링합니다.
+    카드마다 컬럼과 st.markdown을 따로 만들지 않고, 4열 그리드 HTML 하나로 묶어 한 번에 전송합니다.
     """
-    st.write("""<div style="height: 1.5rem;"></div>""", unsafe_allow_html=True)
-    kpi_cols = st.columns(4)
     kpi_data = [
         ("🏠", "보호소 수", shelter_count),
         ("🐾", "보호 동물 수", animal_count),
         ("⏳", "장기 보호 동물", long_term_count),
         ("❤️", "입양 완료", adopted_count)
     ]
-
-    for col, (icon, title, number) in zip(kpi_cols, kpi_data):
-        with col:
-            st.markdown(f"""
-            <div class="kpi-card">
-                <div class="icon">{icon}</div>
-                <div class="title">{title}</div>
-                <div class="number">{number}</div>
-            </div>
-            """, unsafe_allow_html=True)
-    st.write("""<div style="height: 1rem;"></div>""", unsafe_allow_html=True)
+    cards_html = "".join(
+        KPI_CARD_TEMPLATE.format(icon=icon, title=title, number=number)
+        for icon, title, number in kpi_data
+    )
+    st.markdown(f'<div class="kpi-grid">{cards_html}</div>', unsafe_allow_html=True)
 
 def render_tabs(tabs):
     """
     애플리케이션의 메인 탭을 렌더링하고 현재 활성화된 탭을 반환합니다.
     """
     original_labels = [tab["label"] for tab in tabs]
-    favorites_count = len(st.session_state.get('favorites', []))
+    favorites_count = len(st.session_state.get('favorites', set()))
 
     def format_label(label):
         if "찜한 동물" in label:
@@ -123,36 +132,60 @@ def render_tabs(tabs):
     active_tab_idx = original_labels.index(selected_label)
     return tabs[active_tab_idx]
 
-def handle_favorite_button(animal: pd.Series, context: str):
-    """찜하기 버튼의 상태를 관리하고 로직을 처리합니다."""
-    if 'desertion_no' in animal and pd.notna(animal['desertion_no']):
-        is_favorited = animal['desertion_no'] in st.session_state.favorites
-        button_text = "❤️ 찜 취소" if is_favorited else "🤍 찜하기"
-        if st.button(button_text, key=f"fav_{context}_{animal['desertion_no']}"):
-            if is_favorited:
-                st.session_state.favorites.remove(animal['desertion_no'])
-            else:
-                st.session_state.favorites.append(animal['desertion_no'])
-            st.rerun()
+def toggle_favorite(desertion_no):
+    """찜 목록에 동물을 추가하거나 제거합니다. (버튼 on_click 콜백)"""
+    favorites = st.session_state.favorites
+    if desertion_no in favorites:
+        favorites.discard(desertion_no)
+    else:
+        favorites.add(desertion_no)
+
+def handle_favorite_button(desertion_no, fav_key: str):
+    """
+    찜하기 버튼의 상태를 관리하고 로직을 처리합니다.
+    desertion_no와 버튼 key(fav_key)는 호출하는 카드에서 한 번만 구해 전달합니다.
+    찜 목록은 스크립트가 다시 실행되기 전에 on_click 콜백에서 바뀌므로, 변경을 반영하려고 st.rerun()을 한 번 더 호출하지 않습니다.
+    """
+    is_favorited = desertion_no in st.session_state.favorites
+    button_text = "❤️ 찜 취소" if is_favorited else "🤍 찜하기"
+    st.button(button_text, key=fav_key, on_click=toggle_favorite, args=(desertion_no,))
+
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/150?text=사진+없음"
+SEX_DISPLAY = {'F': "♀️ 암컷", 'M': "♂️ 수컷"}
+# 동물 사진 <img> 템플릿: 실제 이미지 URL을 쓸 때는 브라우저가 화면 밖 카드의 이미지 요청을 미루도록 lazy로 지정
+# (base64 data URI는 이미 HTML에 들어 있으므로 lazy 효과가 없음)
+ANIMAL_IMAGE_TEMPLATE = (
+    '<img src="{src}" loading="lazy" decoding="async" width="150" alt="{alt}">'
+    '<div style="font-size: 0.875rem; color: #6C757D;">{caption}</div>'
+)
+
+def resolve_animal_image_src(image_url) -> str:
+    """
+    카드와 표에 표시할 이미지 src를 반환합니다. (HTML에 넣을 때의 이스케이프는 호출하는 쪽에서 처리)
+    https URL은 브라우저가 직접(보이는 이미지만) 받아 오도록 그대로 사용하고,
+    그 외(http 등 혼합 콘텐츠로 차단될 수 있는 URL)는 서버에서 받아 온 base64 data URI로 대체합니다.
+    """
+    if pd.isna(image_url):
+        return PLACEHOLDER_IMAGE
+    if str(image_url).startswith("https://"):
+        return str(image_url)
+    img_b64 = fetch_image_as_base64(image_url)
+    return f"data:image/jpeg;base64,{img_b64}" if img_b64 else PLACEHOLDER_IMAGE
 
 def render_animal_card(animal: pd.Series, context: str, show_shelter: bool = False):
-    """개별 동물 정보를 카드 형태로 렌더링합니다. (base64 프록시 렌더링 방식)"""
+    """개별 동물 정보를 카드 형태로 렌더링합니다. (https 이미지는 직접, 그 외는 base64 프록시 렌더링)"""
     cols = st.columns([1, 3])
     with cols[0]:
         display_name = animal.get('kind_name', animal.get('notice_no', '이름 없음'))
-        image_url = animal.get("image_url")
-
-        if pd.isna(image_url):
-            st.image("https://via.placeholder.com/150?text=사진+없음", width=150)
-        else:
-            img_b64 = fetch_image_as_base64(image_url)
-            if img_b64:
-                st.image(f"data:image/jpeg;base64,{img_b64}", width=150, caption=display_name)
-            else:
-                st.image("https://via.placeholder.com/150?text=사진+없음", width=150)
+        src = resolve_animal_image_src(animal.get("image_url"))
+        caption = "" if src == PLACEHOLDER_IMAGE else html.escape(str(display_name))
+        # st.image 대신 <img>로 직접 그려, Streamlit 미디어 파이프라인(서버 측 이미지 처리/저장)을 거치지 않음
+        st.markdown(ANIMAL_IMAGE_TEMPLATE.format(src=html.escape(src), alt=caption, caption=caption), unsafe_allow_html=True)
 
     with cols[1]:
-        handle_favorite_button(animal, context)
+        desertion_no = animal.get('desertion_no')
+        if pd.notna(desertion_no):
+            handle_favorite_button(desertion_no, f"fav_{context}_{desertion_no}")
         
         age_info = animal.get('age', '정보 없음')
         weight_info = animal.get('weight', '정보 없음')
@@ -161,147 +194,51 @@ def render_animal_card(animal: pd.Series, context: str, show_shelter: bool = Fal
         st.markdown(f"**{display_name}** ({age_info}, {weight_info})")
         if show_shelter:
             st.markdown(f"**🏠 보호소:** {animal.get('shelter_name', '정보 없음')}")
-        sex_display = {'F': "♀️ 암컷", 'M': "♂️ 수컷"}.get(sex_info, "성별 미상")
+        sex_display = SEX_DISPLAY.get(sex_info, "성별 미상")
         st.markdown(f"**성별:** {sex_display}")
         st.markdown(f"**🐾 특징:** {animal.get('special_mark', '정보 없음')}")
         st.markdown(f"**📍 발견 장소:** {animal.get('happen_place', '정보 없음')}")
 
     st.markdown("---")
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _shelter_csv_bytes(shelter_name: str, _df: pd.DataFrame) -> bytes:
+    """
+    보호소 동물 목록의 CSV 바이트를 보호소 이름별로 한 번만 인코딩합니다.
+    _df는 해싱하지 않으며(이름 앞 '_'), 목록이 보호소 이름으로 정해지므로 이름만 캐시 키로 사용합니다.
+    CSV 문자열 전체를 만든 뒤 다시 인코딩하지 않고, 바이트 버퍼에 나눠서(chunksize) 바로 기록합니다.
+    """
+    buffer = io.BytesIO()
+    _df.to_csv(buffer, index=False, encoding='utf-8-sig', chunksize=10_000)
+    return buffer.getvalue()
+
 def render_download_button(df: pd.DataFrame, shelter_name: str):
     """데이터 다운로드 버튼을 렌더링합니다."""
     st.download_button(
         label="📥 선택된 보호소 동물 목록 다운로드 (CSV)",
-        data=df.to_csv(index=False).encode('utf-8-sig'),
+        data=_shelter_csv_bytes(shelter_name, df),
         file_name=f"{shelter_name}_animals.csv",
-        mime="text/csv"
+        mime="text/csv",
+        # 다운로드 클릭으로 스크립트 전체가 다시 실행되지 않도록 함
+        on_click="ignore",
     )
 
-def inject_custom_css():
+CUSTOM_CSS_PATH = os.path.join(CURRENT_DIR, "static", "custom.css")
+
+@st.cache_resource(show_spinner=False)
+def load_custom_css(path):
     """
-    애플리케이션에 적용할 커스텀 CSS를 주입합니다.
+    커스텀 CSS 파일을 프로세스당 한 번만 읽어 <style> 태그 문자열로 반환합니다.
+    (Streamlit 정적 파일은 .css를 text/plain으로 제공하므로 <link> 대신 <style>로 주입)
     """
-    st.markdown("""
-<style>
-    @import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard@v1.3.9/dist/web/static/pretendard.min.css');
-    
-    /* --- General & Body --- */
-    .stApp {
-        background-color: #FAF8F0; /* Warm Ivory Background */
-        font-family: 'Pretendard', -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-    }
-
-    /* --- Main Content Area --- */
-    .block-container {
-        padding: 2rem 3rem 3rem 3rem !important;
-    }
+    with open(path, encoding="utf-8") as css_file:
+        return f"<style>\n{css_file.read()}</style>"
 
-    /* --- Sidebar --- */
-    [data-testid="stSidebar"] {
-        background-color: #F5F1E9; /* Soft Beige Sidebar */
-        border-right: 1px solid #E0DBCF;
-    }
-    [data-testid="stSidebar"] h2 {
-        color: #B58A60; /* Warm Brown Accent */
-        font-weight: 700;
-    }
-    [data-testid="stExpander"] summary {
-        font-weight: 600;
-        color: #B58A60;
-    }
-    
-    /* --- MultiSelect (축종 선택) & General Input Accent --- */
-    span[data-baseweb="tag"] {
-        background-color: #B58A60 !important;
-        color: #FFFFFF !important;
-        border-radius: 0.75rem;
-    }
-    /* This targets the native radio button dot/check */
-    input[type="radio"] {
-        accent-color: #B58A60 !important;
-    }
-
-    /* --- KPI Cards --- */
-    .kpi-card {
-        background-color: #FFFFFF;
-        padding: 1.75rem;
-        border-radius: 12px;
-        box-shadow: 0 4px 15px rgba(0, 0, 0, 0.06);
-        text-align: center;
-        transition: all 0.3s ease-in-out;
-        border-bottom: 4px solid #B58A60;
-        height: 100%;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-    }
-    .kpi-card:hover {
-        transform: translateY(-8px);
-        box-shadow: 0 12px 25px rgba(0, 0, 0, 0.1);
-    }
-    .kpi-card .icon { font-size: 2.8rem; line-height: 1; margin-bottom: 0.75rem; }
-    .kpi-card .title { font-size: 1.05rem; font-weight: 500; color: #6C757D; margin-bottom: 0.5rem; }
-    .kpi-card .number { font-size: 2.2rem; font-weight: 700; color: #343A40; }
-
-    /* --- Tab Navigation (stRadio) --- */
-    div[role="radiogroup"] {
-        display: flex;
-        justify-content: center;
-        margin: 2.5rem 0 2rem 0;
-        gap: 1rem;
-    }
-    div[role="radiogroup"] > label {
-        display: inline-block;
-        padding: 0.75rem 1.75rem;
-        background: #FFFFFF;
-        color: #495057;
-        border-radius: 30px;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        border: 1px solid #DEE2E6;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-        font-weight: 600;
-    }
-    /* Tab Hover */
-    div[role="radiogroup"] > label:hover {
-        background-color: #F5F1E9;
-        border-color: #B58A60;
-        color: #B58A60;
-    }
-    /* Selected tab style */
-    div[role="radiogroup"] > label:has(input:checked) {
-        background-color: #F5F1E9; /* Soft Beige, same as hover */
-        color: #B58A60; /* Warm Brown Text */
-        border: 2px solid #B58A60; /* Thicker Warm Brown Border */
-        box-shadow: 0 5px 15px rgba(181, 138, 96, 0.4);
-        padding: calc(0.75rem - 1px) calc(1.75rem - 1px); /* Adjust padding to keep size consistent */
-    }
-    /* Hide the actual radio button and its focus ring */
-    div[role="radiogroup"] input[type="radio"] {
-        display: none; /* This is the key to the button look */
-    }
-    /* Custom focus ring to override browser default (which can be red/blue) */
-    div[role="radiogroup"] label:focus-within {
-        outline: none;
-        box-shadow: 0 0 0 2px #F5F1E9, 0 0 0 4px #B58A60;
-    }
-    
-    /* --- Footer --- */
-    .footer {
-        text-align: center;
-        margin-top: 4rem;
-        color: #868E96;
-        font-size: 0.9rem;
-    }
-    .footer a {
-        color: #B58A60;
-        text-decoration: none;
-    }
-    .footer a:hover {
-        text-decoration: underline;
-    }
-</style>
-""", unsafe_allow_html=True)
+def inject_custom_css():
+    """
+    애플리케이션에 적용할 커스텀 CSS(static/custom.css)를 주입합니다.
+    """
+    st.markdown(load_custom_css(CUSTOM_CSS_PATH), unsafe_allow_html=True)
 
 def render_footer():
     """
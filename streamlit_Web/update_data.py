@@ -35,10 +35,12 @@ from sqlalchemy import create_engine
 import configparser
 import os
 from datetime import datetime, timedelta
-import subprocess
-import tempfile
+import math
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 
 # --- 경로 설정 ---
@@ -72,77 +74,135 @@ def get_kakao_rest_api_key():
     config.read(CONFIG_PATH)
     return config['API']['kakao_rest_api_key']
 
+# --- HTTP 세션 ---
+# 페이지/지역별로 수백 번 반복되는 API 호출마다 프로세스를 띄우고 TLS 연결을 새로 맺지 않도록,
+# 커넥션 풀(keep-alive)과 재시도 정책을 가진 세션 하나를 모듈 전체에서 공유합니다.
+def _create_session():
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+SESSION = _create_session()
+
+# 페이지 동시 요청 수 (세션 커넥션 풀 크기와 맞춰 API 서버에 과도한 부하를 주지 않도록 제한)
+MAX_PAGE_WORKERS = 4
+
+def _iterparse_items(xml_source):
+    """
+    API 응답 XML을 `iterparse`로 스트리밍 파싱하여
+    (resultCode, resultMsg, totalCount, item 딕셔너리 리스트)를 반환합니다.
+    응답 전체를 문자열로 디코딩하지 않고, `<item>`이 닫힐 때마다 변환 후 해제합니다.
+    본문이 비어 있으면(요소가 하나도 시작되지 않은 채 파싱이 끝나면) 빈 응답으로 보고 None을 반환합니다.
+    """
+    header = {}
+    items = []
+    started = False
+    try:
+        for event, elem in ET.iterparse(xml_source, events=('start', 'end')):
+            started = True
+            if event != 'end':
+                continue
+            if elem.tag == 'item':
+                items.append({child.tag: child.text for child in elem})
+                elem.clear()
+            elif elem.tag in ('resultCode', 'resultMsg', 'totalCount'):
+                header[elem.tag] = elem.text
+    except ET.ParseError:
+        # Content-Length 없이(chunked) 빈 본문이 오면 'no element found' 오류가 나므로, 기존의 빈 응답 처리와 같게 취급
+        # (요소를 읽던 도중의 파싱 오류는 그대로 전달)
+        if started:
+            raise
+        return None
+    return (
+        header.get('resultCode', 'N/A'),
+        header.get('resultMsg', 'N/A'),
+        int(header.get('totalCount') or 0),
+        items,
+    )
+
+def _fetch_xml_items(url):
+    """
+    공유 세션으로 API를 호출하고, 응답 본문을 bytes/str로 모으지 않고 소켓에서 바로 스트리밍 파싱합니다.
+    빈 응답이면(Content-Length가 0이거나 chunked 본문이 비어 있으면) None을, 그렇지 않으면 `_iterparse_items`의 결과를 반환합니다.
+    """
+    with SESSION.get(url, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        if response.headers.get('Content-Length') == '0':
+            return None
+        response.raw.decode_content = True  # gzip 등 전송 인코딩은 urllib3가 풀어서 전달
+        return _iterparse_items(response.raw)
+
 def fetch_abandoned_animals(api_key, bgnde, endde, upkind=''):
-    """공공데이터포털에서 특정 기간과 축종의 유기동물 정보를 가져옵니다."""
+    """
+    공공데이터포털에서 특정 기간과 축종의 유기동물 정보를 가져옵니다.
+    첫 페이지로 전체 건수(totalCount)를 확인한 뒤, 나머지 페이지는 스레드 풀로 동시에 요청합니다.
+    """
     api_key_encoded = quote(api_key)
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/abandonmentPublic_v2"
-
-    all_items = []
-    page_no = 1
     num_of_rows = 1000 # API가 허용하는 최대 요청 개수
 
-    while True:
+    def fetch_page(page_no):
         # API 요청 URL 구성
         url = f"{endpoint}?serviceKey={api_key_encoded}&bgnde={bgnde}&endde={endde}&pageNo={page_no}&numOfRows={num_of_rows}&_type=xml"
         if upkind:
             url += f"&upkind={upkind}"
 
         print(f"[DEBUG] API 요청 URL: {url}")
+        parsed = _fetch_xml_items(url)
 
-        # PowerShell을 사용하여 데이터를 임시 파일로 다운로드
-        fp, temp_path = tempfile.mkstemp(suffix=".xml")
-        os.close(fp)
-
-        try:
-            command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-            subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
-
-            with open(temp_path, 'rb') as f:
-                xml_data = f.read()
-
-            if not xml_data:
-                print(f"경고: 페이지 {page_no}에서 빈 응답을 받았습니다.")
-                break
-
-            root = ET.fromstring(xml_data.decode('utf-8'))
+        if parsed is None:
+            print(f"경고: 페이지 {page_no}에서 빈 응답을 받았습니다.")
+            return None
 
-            # API 응답 코드 확인
-            result_code = root.findtext('.//resultCode', 'N/A')
-            if result_code != '00':
-                print(f"API 오류 발생 (코드: {result_code}, 메시지: {root.findtext('.//resultMsg', 'N/A')})")
-                break
+        result_code, result_msg, total_count, items_in_page = parsed
 
-            items_in_page = root.findall('.//item')
-            if not items_in_page:
-                print(f"정보: 페이지 {page_no}에 더 이상 데이터가 없습니다.")
-                break
+        # API 응답 코드 확인
+        if result_code != '00':
+            print(f"API 오류 발생 (코드: {result_code}, 메시지: {result_msg})")
+            return None
 
-            # 수집된 데이터를 리스트에 추가
-            for item in items_in_page:
-                item_dict = {child.tag: child.text for child in item}
-                all_items.append(item_dict)
+        if not items_in_page:
+            print(f"정보: 페이지 {page_no}에 더 이상 데이터가 없습니다.")
+            return None
 
-            total_count = int(root.findtext('.//totalCount', '0'))
-            print(f"페이지 {page_no}에서 {len(items_in_page)}건 데이터 수집. (현재까지 총 {len(all_items)} / 전체 {total_count}건)")
+        return total_count, items_in_page
 
-            # 모든 데이터를 수집했으면 반복 종료
-            if len(all_items) >= total_count:
-                break
+    all_items = []
 
-            page_no += 1
+    try:
+        # 1. 첫 페이지를 요청하여 전체 건수 확인
+        first_page = fetch_page(1)
+        if first_page is None:
+            return all_items
+
+        total_count, items_in_page = first_page
+        all_items.extend(items_in_page)
+        print(f"페이지 1에서 {len(items_in_page)}건 데이터 수집. (현재까지 총 {len(all_items)} / 전체 {total_count}건)")
+
+        # 2. 나머지 페이지를 동시에 요청 (결과는 페이지 순서대로 수집)
+        remaining_pages = range(2, math.ceil(total_count / num_of_rows) + 1)
+        if remaining_pages:
+            with ThreadPoolExecutor(max_workers=MAX_PAGE_WORKERS) as executor:
+                for page_no, page in zip(remaining_pages, executor.map(fetch_page, remaining_pages)):
+                    # 빈 페이지나 API 오류가 나오면 그 이후 페이지는 버리고, 지금까지 수집한 데이터만 사용
+                    if page is None:
+                        break
+                    _, items_in_page = page
+                    all_items.extend(items_in_page)
+                    print(f"페이지 {page_no}에서 {len(items_in_page)}건 데이터 수집. (현재까지 총 {len(all_items)} / 전체 {total_count}건)")
 
-        except subprocess.CalledProcessError as e:
-            print(f"PowerShell을 통한 데이터 다운로드 중 오류 발생: {e.stderr}")
-            return None # 오류 발생 시 None 반환
-        except ET.ParseError as e:
-            print(f"XML 파싱 오류: {e}")
-            return None
-        except Exception as e:
-            print(f"알 수 없는 오류 발생: {e}")
-            return None
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+    except requests.exceptions.RequestException as e:
+        print(f"API 데이터 다운로드 중 오류 발생: {e}")
+        return None # 오류 발생 시 None 반환
+    except ET.ParseError as e:
+        print(f"XML 파싱 오류: {e}")
+        return None
+    except Exception as e:
+        print(f"알 수 없는 오류 발생: {e}")
+        return None
 
     return all_items
 
@@ -152,30 +212,20 @@ def _fetch_sido_list(api_key):
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/sido_v2"
     url = f"{endpoint}?serviceKey={api_key_encoded}&numOfRows=100&_type=xml"
     
-    fp, temp_path = tempfile.mkstemp(suffix=".xml")
-    os.close(fp)
-    
     try:
-        command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-        subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
+        parsed = _fetch_xml_items(url)
         
-        with open(temp_path, 'rb') as f:
-            xml_data = f.read()
-        
-        if not xml_data:
+        if parsed is None:
             return []
             
-        root = ET.fromstring(xml_data.decode('utf-8'))
+        _, _, _, items = parsed
         sido_list = []
-        for item in root.findall('.//item'):
-            sido_list.append({"code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")})
+        for item in items:
+            sido_list.append({"code": item.get("orgCd"), "name": item.get("orgdownNm")})
         return sido_list
     except Exception as e:
         print(f"시/도 목록 조회 중 오류 발생: {e}")
         return []
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 def _fetch_sigungu_list(api_key, sido_code):
     """특정 시/도에 속한 시/군/구 목록을 조회하는 내부 함수입니다."""
@@ -183,30 +233,20 @@ def _fetch_sigungu_list(api_key, sido_code):
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/sigungu_v2"
     url = f"{endpoint}?serviceKey={api_key_encoded}&upr_cd={sido_code}&_type=xml"
     
-    fp, temp_path = tempfile.mkstemp(suffix=".xml")
-    os.close(fp)
-    
     try:
-        command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-        subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
+        parsed = _fetch_xml_items(url)
         
-        with open(temp_path, 'rb') as f:
-            xml_data = f.read()
-        
-        if not xml_data:
+        if parsed is None:
             return []
             
-        root = ET.fromstring(xml_data.decode('utf-8'))
+        _, _, _, items = parsed
         sigungu_list = []
-        for item in root.findall('.//item'):
-            sigungu_list.append({"upr_code": item.findtext("uprCd"), "code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")})
+        for item in items:
+            sigungu_list.append({"upr_code": item.get("uprCd"), "code": item.get("orgCd"), "name": item.get("orgdownNm")})
         return sigungu_list
     except Exception as e:
         print(f"시/군/구 목록 조회 중 오류 발생: {e}")
         return []
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 def fetch_shelters(api_key):
     """전국의 모든 동물보호소 정보를 시/도 및 시/군/구별로 순회하며 가져옵니다."""
@@ -238,110 +278,23 @@ def fetch_shelters(api_key):
             url = f"{endpoint}?serviceKey={api_key_encoded}&upr_cd={sido_code}&org_cd={sigungu_code}&_type=xml"
             print(f"[DEBUG] 보호소 API 요청 URL: {url}")
 
-            fp, temp_path = tempfile.mkstemp(suffix=".xml")
-            os.close(fp)
-
             try:
-                command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-                subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
+                parsed = _fetch_xml_items(url)
 
-                with open(temp_path, 'rb') as f:
-                    xml_data = f.read()
-
-                if not xml_data:
+                if parsed is None:
                     continue
 
-                root = ET.fromstring(xml_data.decode('utf-8'))
-                result_code = root.findtext('.//resultCode', 'N/A')
+                result_code, result_msg, _, items_in_page = parsed
 
                 if result_code != '00':
                     if result_code != '03':
-                         print(f"API 오류 (코드: {result_code}, 메시지: {root.findtext('.//resultMsg', 'N/A')})")
+                         print(f"API 오류 (코드: {result_code}, 메시지: {result_msg})")
                     continue
 
-                items_in_page = root.findall('.//item')
-                for item in items_in_page:
-                    item_dict = {child.tag: child.text for child in item}
-                    all_shelters.append(item_dict)
+                all_shelters.extend(items_in_page)
 
             except Exception as e:
                 print(f"{sigungu_name} 보호소 조회 중 오류 발생: {e}")
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-    
-    return all_shelters
-
-    api_key_encoded = quote(api_key)
-    endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/shelter_v2"
-    all_shelters = []
-    sido_list = _fetch_sido_list(api_key)
-
-    if not sido_list:
-        print("경고: 시도 목록을 가져오지 못하여 보호소 데이터를 수집할 수 없습니다.")
-        return []
-
-    for sido_info in sido_list:
-        sido_code = sido_info['code']
-        sido_name = sido_info['name']
-        print(f"--- {sido_name} ({sido_code}) 보호소 데이터 수집 시작 ---")
-
-        page_no = 1
-        collected_in_sido = 0
-        total_in_sido = -1 # -1로 초기화하여 아직 totalCount를 받지 않았음을 표시
-
-        while True:
-            url = f"{endpoint}?serviceKey={api_key_encoded}&upr_cd={sido_code}&pageNo={page_no}&numOfRows=1000&_type=xml"
-            print(f"[DEBUG] 보호소 API 요청 URL: {url}") # 디버깅을 위한 URL 출력
-
-            fp, temp_path = tempfile.mkstemp(suffix=".xml")
-            os.close(fp)
-
-            try:
-                command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-                subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
-
-                with open(temp_path, 'rb') as f:
-                    xml_data = f.read()
-
-                if not xml_data:
-                    print(f"경고: {sido_name} 페이지 {page_no}에서 빈 응답을 받았습니다.")
-                    break
-
-                root = ET.fromstring(xml_data.decode('utf-8'))
-                result_code = root.findtext('.//resultCode', 'N/A')
-
-                if result_code != '00':
-                    print(f"API 오류 (코드: {result_code}, 메시지: {root.findtext('.//resultMsg', 'N/A')})")
-                    break
-
-                items_in_page = root.findall('.//item')
-                if not items_in_page:
-                    print(f"정보: {sido_name} 페이지 {page_no}에 더 이상 데이터가 없습니다.")
-                    break
-
-                for item in items_in_page:
-                    item_dict = {child.tag: child.text for child in item}
-                    all_shelters.append(item_dict)
-                
-                collected_in_sido += len(items_in_page)
-
-                if total_in_sido == -1: # 첫 요청 시에만 totalCount를 설정
-                    total_in_sido = int(root.findtext('.//totalCount', '0'))
-
-                print(f"{sido_name} 페이지 {page_no}에서 {len(items_in_page)}건 수집. (현재 시/도 누적 {collected_in_sido} / 전체 {total_in_sido}건)")
-
-                if collected_in_sido >= total_in_sido:
-                    break
-                
-                page_no += 1
-
-            except Exception as e:
-                print(f"{sido_name} 보호소 조회 중 오류 발생: {e}")
-                break
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
     
     return all_shelters
 
@@ -361,7 +314,7 @@ def get_coordinates_from_address(address):
     params = {"query": address}
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = SESSION.get(url, headers=headers, params=params, timeout=10)
         response.raise_for_status() # HTTP 오류 발생 시 예외 처리
         data = response.json()
         
@@ -379,13 +332,18 @@ def get_coordinates_from_address(address):
         return None, None
 
 def preprocess_data(animal_df_raw, shelter_api_df_raw):
+    """
+    API 원본 데이터를 가공하여 (보호소 DataFrame, 동물 DataFrame)을 반환합니다.
+    DataFrame으로 전달된 원본은 복사 없이 직접 변경되므로, 호출 후에는 재사용하지 않아야 합니다.
+    """
     print(f"[DEBUG] preprocess_data 시작. animal_df_raw 타입: {type(animal_df_raw)}, shelter_api_df_raw 타입: {type(shelter_api_df_raw)}")
 
     # -------------------------------------
     # 1. 동물 데이터 처리
     # -------------------------------------
+    # 입력으로 받은 원본 DataFrame은 전처리 전용이므로 복사하지 않고 그대로 가공 (피크 메모리 절감)
     if isinstance(animal_df_raw, pd.DataFrame):
-        animals_df = animal_df_raw.copy()
+        animals_df = animal_df_raw
     else:
         animals_df = pd.DataFrame(animal_df_raw)
 
@@ -461,7 +419,7 @@ def preprocess_data(animal_df_raw, shelter_api_df_raw):
     # 2. 보호소 데이터 처리
     # -------------------------------------
     if isinstance(shelter_api_df_raw, pd.DataFrame):
-        shelter_api_df_processed = shelter_api_df_raw.copy()
+        shelter_api_df_processed = shelter_api_df_raw
     else:
         shelter_api_df_processed = pd.DataFrame(shelter_api_df_raw)
 
@@ -4,6 +4,9 @@ import os
 from sqlalchemy import create_engine
 from utils import get_db_config  # 기존 utils.py에 있는 DB 설정 함수 재사용
 
+# DB에 JSON 문자열로 저장할 컬럼과 원본 타입
+JSON_COLUMNS = {"태그": list, "임보 조건": dict, "히스토리": dict, "건강 정보": dict}
+
 # --- JSON -> DataFrame 로딩 함수 ---
 def load_json_to_df():
     base_path = os.path.join(os.path.dirname(__file__), "data")
@@ -17,15 +20,12 @@ def load_json_to_df():
     dog_df = pd.DataFrame(dog_data)
 
     # 리스트나 딕셔너리를 문자열(JSON)으로 변환
+    # json.dumps(..., ensure_ascii=False)는 호출마다 인코더를 새로 만들므로, 인코더 하나를 재사용
+    encode = json.JSONEncoder(ensure_ascii=False).encode
     for df in [cat_df, dog_df]:
-        if "태그" in df.columns:
-            df["태그"] = df["태그"].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, list) else x)
-        if "임보 조건" in df.columns:
-            df["임보 조건"] = df["임보 조건"].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, dict) else x)
-        if "히스토리" in df.columns:
-            df["히스토리"] = df["히스토리"].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, dict) else x)
-        if "건강 정보" in df.columns:
-            df["건강 정보"] = df["건강 정보"].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, dict) else x)
+        for col, col_type in JSON_COLUMNS.items():
+            if col in df.columns:
+                df[col] = [encode(x) if isinstance(x, col_type) else x for x in df[col]]
 
     return cat_df, dog_df
 
@@ -43,12 +43,13 @@ def update_web_database(cat_df, dog_df):
             f"{db_config['host']}:{db_config['port']}/{db_config['database']}?charset=utf8mb4"
         )
 
+        # 페이지 조회(LIMIT/OFFSET)의 행 순서가 항상 같도록, JSON의 순서대로 인덱스가 걸린 id 컬럼을 함께 저장
         with engine.connect() as conn:
             if not cat_df.empty:
-                cat_df.to_sql('web_cats', conn, if_exists='replace', index=False)
+                cat_df.to_sql('web_cats', conn, if_exists='replace', index=True, index_label='id')
                 print(f"web_cats 테이블에 {len(cat_df)}개 데이터 저장 완료!")
             if not dog_df.empty:
-                dog_df.to_sql('web_dogs', conn, if_exists='replace', index=False)
+                dog_df.to_sql('web_dogs', conn, if_exists='replace', index=True, index_label='id')
                 print(f"web_dogs 테이블에 {len(dog_df)}개 데이터 저장 완료!")
 
         print("웹 데이터베이스 업데이트 성공!")
@@ -21,6 +21,9 @@ import configparser
 import os
 import base64
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+import pandas as pd
 
 def get_image_as_base64(path: str) -> str | None:
     """
@@ -39,6 +42,19 @@ def get_image_as_base64(path: str) -> str | None:
     except FileNotFoundError:
         return None
 
+def frame_cache_key(df: pd.DataFrame) -> tuple:
+    """
+    st.cache_data/st.cache_resource의 hash_funcs에 사용할 DataFrame 캐시 키를 반환합니다.
+    필터링 결과는 원본 테이블의 행 부분집합이므로, 전체 값을 해싱하지 않고 행 수, 컬럼, 인덱스만 사용합니다.
+
+    Args:
+        df (pd.DataFrame): 캐시 키를 만들 DataFrame
+
+    Returns:
+        tuple: (행 수, 컬럼 튜플, 인덱스 해시 합)
+    """
+    return len(df), tuple(df.columns), int(pd.util.hash_pandas_object(df.index).sum())
+
 def format_date(dt: datetime) -> str:
     """
     datetime 객체를 'YYYY-MM-DD' 형식의 문자열로 변환합니다.
@@ -51,9 +67,12 @@ def format_date(dt: datetime) -> str:
     """
     return dt.strftime("%Y-%m-%d")
 
-def get_db_config() -> dict:
+@lru_cache(maxsize=1)
+def get_db_config() -> MappingProxyType:
     """
     프로젝트 루트에 있는 config.ini에서 DB 설정 정보를 읽어 반환합니다.
+    설정 파일은 프로세스당 한 번만 읽으며, 공유되는 결과가 변경되지 않도록 읽기 전용 매핑으로 반환합니다.
+    (파일이 없는 등 예외가 발생한 경우에는 캐시되지 않아 다음 호출에서 다시 읽습니다)
     """
     current_file = os.path.abspath(__file__)
     streamlit_web_dir = os.path.dirname(current_file)
@@ -70,10 +89,10 @@ def get_db_config() -> dict:
     if "DB" not in config:
         raise KeyError(f"[DB] 섹션을 config.ini에서 찾을 수 없습니다. (path={config_path})")
 
-    return {
+    return MappingProxyType({
         "host": config["DB"]["host"],
         "user": config["DB"]["user"],
         "password": config["DB"]["password"],
         "database": config["DB"]["database"],
         "port": int(config["DB"]["port"])
-    }
+    })